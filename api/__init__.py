@@ -5,6 +5,7 @@ Flask application initialization and configuration.
 
 from flask import Flask
 from flask_cors import CORS
+from flask_compress import Compress
 from core.logging_config import get_logger
 
 # Configure logging
@@ -33,6 +34,11 @@ def create_app(config=None):
     app.config.from_mapping(
         SECRET_KEY='dev',
         DATABASE='sqlite:///:memory:',
+        # Response compression: option chains are highly repetitive JSON
+        COMPRESS_ALGORITHM=['br', 'gzip'],
+        COMPRESS_MIN_SIZE=1024,
+        COMPRESS_LEVEL=4,
+        COMPRESS_BR_LEVEL=4,
     )
     
     # Override with passed config
@@ -40,6 +46,10 @@ def create_app(config=None):
         app.config.update(config)
         logger.debug("Applied custom configuration")
     
+    # Enable response compression
+    Compress(app)
+    logger.debug("Response compression enabled for API")
+    
     # Register blueprints
     from api.routes import portfolio, options, recommendations
     app.register_blueprint(portfolio.bp)
@@ -2,9 +2,15 @@
 Options API routes
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, current_app
 from api.services.options_service import OptionsService
-import traceback
+from api.services.job_service import JobService
+from db.database import PendingOrderCache
+from typing import List, Literal, Optional
+import concurrent.futures
+import msgspec
+import orjson
+import threading
 import logging
 import time
 import json
@@ -14,6 +20,259 @@ logger = logging.getLogger('api.routes.options')
 
 bp = Blueprint('options', __name__, url_prefix='/api/options')
 options_service = OptionsService()
+job_service = JobService(options_service.db)
+pending_orders_cache = PendingOrderCache(options_service.db)
+
+def init_database(db):
+    """
+    Use the application's database instance for all options routes and jobs,
+    so that routes never have to look it up per request
+    
+    Args:
+        db (OptionsDatabase): Database instance created by the application
+    """
+    options_service.db = db
+    job_service.db = db
+    pending_orders_cache.db = db
+    pending_orders_cache.invalidate()
+    pending_orders_cache.snapshot()
+
+def fast_jsonify(obj, status=200):
+    """
+    Serialize obj to a JSON response using orjson, which is considerably
+    faster than the stdlib encoder behind Flask's jsonify for large option chains.
+    
+    Args:
+        obj: JSON-serializable object
+        status (int, optional): HTTP status code
+        
+    Returns:
+        Response: JSON response
+    """
+    return current_app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype='application/json'
+    )
+
+def etag_matches(etag):
+    """
+    Check whether the request's If-None-Match holds etag. Compressed responses
+    carry the ETag with the algorithm appended (e.g. "abc:br"), so that suffix
+    is ignored when comparing.
+    
+    Args:
+        etag (str): Current ETag of the resource
+        
+    Returns:
+        bool: True if the client's copy is still current
+    """
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    return any(tag.split(':', 1)[0] == etag for tag in if_none_match.as_set())
+
+def not_modified(etag):
+    """
+    Build an empty 304 response for etag
+    """
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+# Static error responses, serialized once at import instead of on every request
+STATIC_ERRORS = {
+    key: (orjson.dumps({"error": message}), status)
+    for key, (message, status) in {
+        'otm_timeout': ("Timed out waiting for option data", 504),
+        'save_order_failed': ("Failed to save order", 500),
+        'save_orders_failed': ("Failed to save orders", 500),
+        'empty_orders': ("Expected a non-empty list of orders", 400),
+        'invalid_quantity': ("Quantity must be greater than 0", 400),
+        'order_not_pending': ("Cannot update quantity for non-pending orders", 400),
+        'stream_busy': ("Too many open order streams, poll /pending-orders instead", 503),
+    }.items()
+}
+
+def error_response(key):
+    """
+    Build one of the STATIC_ERRORS responses
+    
+    Args:
+        key (str): Key of the error in STATIC_ERRORS
+        
+    Returns:
+        Response: JSON error response
+    """
+    body, status = STATIC_ERRORS[key]
+    return current_app.response_class(body, status=status, mimetype='application/json')
+
+# Short-lived cache for /otm results. Many clients poll the same ticker/OTM%
+# combination, so results are reused for a few seconds instead of going back
+# to IB on every request.
+OTM_CACHE_TTL = 3  # seconds
+OTM_CACHE_MAXSIZE = 512
+OTM_WAIT_TIMEOUT = 60  # seconds a request waits for its option chains
+_otm_cache = {}  # key -> (expires_at, result)
+_otm_inflight = {}  # key -> Future for results currently being computed
+_otm_cache_lock = threading.Lock()
+# Option chains are loaded on the service's persistent pool, so each of its threads
+# keeps its own IB connection and requests only wait for the result
+_otm_executor = options_service.otm_executor
+
+def _load_and_store(key, loader):
+    """
+    Run loader for key on the executor and cache its result
+    """
+    try:
+        result = loader()
+    finally:
+        with _otm_cache_lock:
+            _otm_inflight.pop(key, None)
+    
+    with _otm_cache_lock:
+        now = time.monotonic()
+        if len(_otm_cache) >= OTM_CACHE_MAXSIZE:
+            # Drop expired entries first, then the oldest ones if still full
+            for expired_key in [k for k, (expires_at, _) in _otm_cache.items() if expires_at <= now]:
+                del _otm_cache[expired_key]
+            while len(_otm_cache) >= OTM_CACHE_MAXSIZE:
+                del _otm_cache[next(iter(_otm_cache))]
+        _otm_cache[key] = (now + OTM_CACHE_TTL, result)
+    return result
+
+def get_future(key, loader):
+    """
+    Return a future for the cached result of key, starting loader on a cache miss.
+    Concurrent misses for the same key share a single in-flight call
+    instead of issuing their own backend call.
+    
+    Args:
+        key (tuple): Cache key
+        loader (callable): Function computing the result on a miss
+        
+    Returns:
+        concurrent.futures.Future: Future holding the cached or computed result.
+            A caller that stops waiting does not cancel the call, which still
+            caches its result for later requests.
+    """
+    with _otm_cache_lock:
+        entry = _otm_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            future = concurrent.futures.Future()
+            future.set_result(entry[1])
+            return future
+        
+        future = _otm_inflight.get(key)
+        if future is None:
+            future = _otm_executor.submit(_load_and_store, key, loader)
+            _otm_inflight[key] = future
+    
+    return future
+
+def get_or_compute(key, loader, timeout=OTM_WAIT_TIMEOUT):
+    """
+    Return the cached result for key, calling loader on a cache miss
+    
+    Args:
+        key (tuple): Cache key
+        loader (callable): Function computing the result on a miss
+        timeout (float, optional): Seconds to wait for the result
+        
+    Returns:
+        The cached or freshly computed result
+        
+    Raises:
+        concurrent.futures.TimeoutError: If the result is not ready in time
+    """
+    return get_future(key, loader).result(timeout=timeout)
+
+class OtmParams(msgspec.Struct):
+    """
+    Query parameters accepted by the /otm endpoint
+    """
+    tickers: Optional[str] = None
+    otm: float = 10.0
+    optionType: Optional[Literal['CALL', 'PUT']] = None  # Filter by option type
+
+class OrderSchema(msgspec.Struct):
+    """
+    JSON body of a new option order. Fields not listed here are ignored.
+    """
+    ticker: str
+    option_type: str
+    strike: float
+    expiration: str
+    action: str = 'SELL'  # Default action is sell for options
+    premium: Optional[float] = 0
+    quantity: int = 1
+    
+    # Price data
+    bid: Optional[float] = 0
+    ask: Optional[float] = 0
+    last: Optional[float] = 0
+    
+    # Greeks
+    delta: Optional[float] = 0
+    gamma: Optional[float] = 0
+    theta: Optional[float] = 0
+    vega: Optional[float] = 0
+    implied_volatility: Optional[float] = 0
+    
+    # Market data
+    open_interest: Optional[float] = 0
+    volume: Optional[float] = 0
+    is_mock: bool = False
+    
+    # Earnings data
+    earnings_max_contracts: Optional[float] = 0
+    earnings_premium_per_contract: Optional[float] = 0
+    earnings_total_premium: Optional[float] = 0
+    earnings_return_on_cash: Optional[float] = 0
+    earnings_return_on_capital: Optional[float] = 0
+
+class QuantityUpdate(msgspec.Struct):
+    """
+    JSON body of an order quantity update
+    """
+    quantity: int
+
+def decode_body(schema):
+    """
+    Decode and validate the JSON request body in one pass
+    
+    Args:
+        schema: msgspec type the body must match
+        
+    Returns:
+        Decoded body
+        
+    Raises:
+        msgspec.DecodeError: If the body is not valid JSON or does not match schema
+    """
+    return msgspec.json.decode(request.get_data(cache=False), type=schema, strict=False)
+
+@bp.errorhandler(msgspec.DecodeError)
+def handle_validation_error(e):
+    """
+    Return a 400 response for request parameters or bodies that fail validation
+    """
+    logger.error("Invalid request: %s", e)
+    return fast_jsonify({"error": f"Invalid request: {str(e)}"}), 400
+
+def job_accepted(job_id):
+    """
+    Build the 202 response returned for a queued background job
+    
+    Args:
+        job_id (str): ID of the queued job
+        
+    Returns:
+        Response: JSON response pointing at the job status endpoint
+    """
+    response = fast_jsonify({"success": True, "job_id": job_id, "status": "queued"}, status=202)
+    response.headers['Location'] = f"{bp.url_prefix}/jobs/{job_id}"
+    return response
 
 # Market status is now checked directly in the route functions
 
@@ -23,53 +282,85 @@ def otm_options():
     """
     Get option data based on OTM percentage from current price.
     """
-    # Get parameters from request
-    ticker = request.args.get('tickers')
-    otm_percentage = float(request.args.get('otm', 10))
-    option_type = request.args.get('optionType')  # New parameter for filtering by option type
-    
-    # Validate option_type if provided
-    if option_type and option_type not in ['CALL', 'PUT']:
-        return jsonify({"error": f"Invalid option_type: {option_type}. Must be 'CALL' or 'PUT'"}), 400
-    
-    # Use the existing module-level instance instead of creating a new one
-    # Call the service with appropriate parameters including the new option_type
-    result = options_service.get_otm_options(
-        ticker=ticker,
-        otm_percentage=otm_percentage,
-        option_type=option_type
-    )
+    # Parse and validate parameters in one pass; invalid values raise
+    # msgspec.ValidationError, which is turned into a 400 by handle_validation_error
+    params = msgspec.convert(request.args.to_dict(), OtmParams, strict=False)
+    # Several tickers can be requested at once as a comma-separated list
+    tickers = [ticker.strip() for ticker in (params.tickers or '').split(',') if ticker.strip()]
+    otm_percentage = params.otm
+    option_type = params.optionType
+    
+    def loader_for(ticker):
+        return lambda: options_service.get_otm_options_single(ticker, otm_percentage, option_type)
+    
+    # Load all tickers concurrently on the executor. Repeated polls are served from
+    # the short-lived cache per ticker unless explicitly bypassed.
+    if request.args.get('nocache'):
+        futures = {ticker: _otm_executor.submit(loader_for(ticker)) for ticker in tickers}
+    else:
+        futures = {ticker: get_future((ticker, otm_percentage, option_type), loader_for(ticker)) for ticker in tickers}
     
-    return jsonify(result)
+    try:
+        deadline = time.monotonic() + OTM_WAIT_TIMEOUT
+        result = {'data': {
+            ticker: future.result(timeout=max(0, deadline - time.monotonic()))
+            for ticker, future in futures.items()
+        }}
+    except concurrent.futures.TimeoutError:
+        logger.error("Timed out waiting for option data for %s", params.tickers)
+        return error_response('otm_timeout')
+    
+    # Unchanged results are answered with an empty 304 instead of the full chain
+    response = fast_jsonify(result)
+    response.add_etag()
+    etag = response.get_etag()[0]
+    if etag_matches(etag):
+        return not_modified(etag)
+    return response
 
 @bp.route('/order', methods=['POST'])
 def save_order():
     """
     Save an option order to the database
     """
+    # Invalid bodies are answered with a 400 by handle_validation_error
+    order = decode_body(OrderSchema)
+    
     try:
-        # Get order data from request
-        order_data = request.json
-        if not order_data:
-            return jsonify({"error": "No order data provided"}), 400
-            
-        # Validate required fields
-        required_fields = ['ticker', 'option_type', 'strike', 'expiration']
-        for field in required_fields:
-            if field not in order_data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
-        
         # Save order to database
-        order_id = options_service.db.save_order(order_data)
+        order_id = options_service.db.save_order(msgspec.structs.asdict(order))
         
         if order_id:
-            return jsonify({"success": True, "order_id": order_id}), 201
+            pending_orders_cache.notify_changed()
+            return fast_jsonify({"success": True, "order_id": order_id}), 201
         else:
-            return jsonify({"error": "Failed to save order"}), 500
+            return error_response('save_order_failed')
     except Exception as e:
-        logger.error(f"Error saving order: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error saving order: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
+
+@bp.route('/orders', methods=['POST'])
+def save_orders_bulk():
+    """
+    Save several option orders to the database in one request
+    """
+    # Every order is validated before any of them is saved
+    orders = decode_body(List[OrderSchema])
+    if not orders:
+        return error_response('empty_orders')
+    
+    try:
+        # Save all orders in a single transaction
+        order_ids = options_service.db.save_orders_bulk([msgspec.structs.asdict(order) for order in orders])
+        
+        if order_ids:
+            pending_orders_cache.notify_changed()
+            return fast_jsonify({"success": True, "order_ids": order_ids}), 201
+        else:
+            return error_response('save_orders_failed')
+    except Exception as e:
+        logger.exception("Error saving orders: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
 
 @bp.route('/pending-orders', methods=['GET'])
 def get_pending_orders():
@@ -80,14 +371,71 @@ def get_pending_orders():
         # Get executed parameter (optional)
         executed = request.args.get('executed', 'false').lower() == 'true'
         
-        # Get pending orders from database
-        orders = options_service.db.get_pending_orders(executed=executed)
+        # The ETag follows the orders version, so an unchanged poll is
+        # answered with a 304 before the orders are even queried
+        version = options_service.db.orders_version()
+        etag = f"{version}.{int(executed)}"
+        if etag_matches(etag):
+            return not_modified(etag)
         
-        return jsonify({"orders": orders})
+        if executed:
+            # Executed orders are rarely requested, read them from the database
+            orders = options_service.db.get_pending_orders(executed=True)
+        else:
+            # Pending orders come from the in-memory copy, reloaded only after changes
+            orders = pending_orders_cache.snapshot(version)
+        
+        response = fast_jsonify({"orders": orders})
+        response.set_etag(etag)
+        return response
     except Exception as e:
-        logger.error(f"Error getting pending orders: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error getting pending orders: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
+
+# Server-sent event stream of pending orders. Each open stream occupies a worker
+# thread, so only a few are allowed per process; other clients keep polling.
+ORDER_STREAM_MAX_CLIENTS = 1  # per process
+ORDER_STREAM_LIFETIME = 300  # seconds before the stream ends and the client reconnects
+ORDER_STREAM_CHECK_INTERVAL = 1  # seconds between checks for writes by other processes
+ORDER_STREAM_KEEPALIVE = 5  # seconds of silence before a keep-alive comment; also how soon a closed client is noticed
+_order_stream_slots = threading.BoundedSemaphore(ORDER_STREAM_MAX_CLIENTS)
+
+@bp.route('/orders/stream', methods=['GET'])
+def stream_pending_orders():
+    """
+    Stream the pending orders as server-sent events. The full list is sent on
+    connect and again whenever it changes, instead of clients polling /pending-orders.
+    """
+    if not _order_stream_slots.acquire(blocking=False):
+        return error_response('stream_busy')
+    
+    db = options_service.db
+    
+    def generate():
+        last_version = None
+        last_sent = time.monotonic()
+        deadline = last_sent + ORDER_STREAM_LIFETIME
+        
+        while time.monotonic() < deadline:
+            version = db.orders_version()
+            if version != last_version:
+                orders = pending_orders_cache.snapshot(version)
+                last_version = version
+                last_sent = time.monotonic()
+                yield b"data: " + orjson.dumps({"orders": orders}) + b"\n\n"
+            elif time.monotonic() - last_sent >= ORDER_STREAM_KEEPALIVE:
+                last_sent = time.monotonic()
+                yield b": keep-alive\n\n"
+            
+            # Woken up early by writes made in this process
+            pending_orders_cache.wait_for_change(ORDER_STREAM_CHECK_INTERVAL)
+    
+    response = current_app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Release the slot however the stream ends, including client disconnects
+    response.call_on_close(_order_stream_slots.release)
+    return response
 
 @bp.route('/order/<int:order_id>', methods=['DELETE'])
 def delete_order(order_id):
@@ -100,88 +448,92 @@ def delete_order(order_id):
     Returns:
         JSON response with success status
     """
-    logger.info(f"DELETE /order/{order_id} request received")
+    logger.info("DELETE /order/%s request received", order_id)
     
     try:
-        # Get the database instance
-        db = current_app.config.get('database')
-        if not db:
-            logger.error("Database not initialized")
-            return jsonify({"error": "Database not initialized"}), 500
-            
-        # Try to get the order first to ensure it exists
-        order = db.get_order(order_id)
-        if not order:
-            logger.error(f"Order with ID {order_id} not found")
-            return jsonify({"error": f"Order with ID {order_id} not found"}), 404
-            
-        # Delete the order
-        success = db.delete_order(order_id)
+        # Delete the order; no row deleted means the order does not exist
+        if not options_service.db.delete_order_if_exists(order_id):
+            logger.error("Order with ID %s not found", order_id)
+            return fast_jsonify({"error": f"Order with ID {order_id} not found"}), 404
         
-        if success:
-            logger.info(f"Order with ID {order_id} successfully deleted")
-            return jsonify({"success": True, "message": f"Order with ID {order_id} deleted"}), 200
-        else:
-            logger.error(f"Failed to delete order with ID {order_id}")
-            return jsonify({"error": "Failed to delete order"}), 500
-            
+        pending_orders_cache.notify_changed()
+        logger.info("Order with ID %s successfully deleted", order_id)
+        return fast_jsonify({"success": True, "message": f"Order with ID {order_id} deleted"}), 200
+    
     except Exception as e:
-        logger.error(f"Error deleting order: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error deleting order: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
 
 @bp.route('/execute/<int:order_id>', methods=['POST'])
 def execute_order(order_id):
     """
-    Execute an order by sending it to TWS.
+    Queue an order to be sent to TWS in the background.
     
     Args:
         order_id (int): ID of the order to execute
         
     Returns:
-        JSON response with execution details
+        JSON response with the job ID; poll /jobs/<job_id> for the execution details
     """
-    logger.info(f"POST /execute/{order_id} request received")
+    logger.info("POST /execute/%s request received", order_id)
     
     try:
-        # Get the database instance
-        db = current_app.config.get('database')
-        if not db:
-            logger.error("Database not initialized")
-            return jsonify({"error": "Database not initialized"}), 500
-            
-        # Use the options service to execute the order
-        response, status_code = options_service.execute_order(order_id, db)
+        # Use the options service to execute the order without holding up the request
+        job_id = job_service.submit('execute_order', options_service.execute_order, order_id, options_service.db)
         
-        # Return the response from the service
-        return jsonify(response), status_code
+        return job_accepted(job_id)
             
     except Exception as e:
-        logger.error(f"Error executing order: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error executing order: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
 
 @bp.route('/check-orders', methods=['POST'])
 def check_orders():
     """
-    Check status of pending/processing orders with TWS API and update them in the database.
+    Queue a check of pending/processing orders with TWS API, updating them in the database.
     
     Returns:
-        JSON response with updated orders
+        JSON response with the job ID; poll /jobs/<job_id> for the updated orders
     """
     logger.info("POST /check-orders request received")
     
     try:
-        # Use the options service to check and update order statuses
-        response = options_service.check_pending_orders()
+        # Use the options service to check and update order statuses in the background.
+        # Repeated checks while one is still queued or running share that job.
+        job_id = job_service.submit('check_orders', options_service.check_pending_orders, coalesce=True)
         
-        # Return the response from the service
-        return jsonify(response), 200
+        return job_accepted(job_id)
             
     except Exception as e:
-        logger.error(f"Error checking orders: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error checking orders: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Get the status and result of a background job.
+    
+    Args:
+        job_id (str): ID of the job
+        
+    Returns:
+        JSON response with the job status, and its result once finished
+    """
+    try:
+        job = job_service.get_job(job_id)
+        if not job:
+            return fast_jsonify({"error": f"Job with ID {job_id} not found"}), 404
+        
+        return fast_jsonify({
+            "job_id": job['id'],
+            "job_type": job['job_type'],
+            "status": job['status'],
+            "result": job['result'],
+            "status_code": job['status_code']
+        })
+    except Exception as e:
+        logger.exception("Error getting job: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
 
 @bp.route('/cancel/<int:order_id>', methods=['POST'])
 def cancel_order(order_id):
@@ -194,19 +546,18 @@ def cancel_order(order_id):
     Returns:
         JSON response with cancellation details
     """
-    logger.info(f"POST /cancel/{order_id} request received")
+    logger.info("POST /cancel/%s request received", order_id)
     
     try:
         # Use the options service to cancel the order
         response, status_code = options_service.cancel_order(order_id)
         
         # Return the response from the service
-        return jsonify(response), status_code
+        return fast_jsonify(response), status_code
             
     except Exception as e:
-        logger.error(f"Error canceling order: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error canceling order: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
 
 @bp.route('/order/<int:order_id>/quantity', methods=['PUT'])
 def update_order_quantity(order_id):
@@ -219,57 +570,36 @@ def update_order_quantity(order_id):
     Returns:
         JSON response with success status
     """
-    logger.info(f"PUT /order/{order_id}/quantity request received")
+    logger.info("PUT /order/%s/quantity request received", order_id)
+    
+    # Invalid bodies are answered with a 400 by handle_validation_error
+    quantity = decode_body(QuantityUpdate).quantity
     
     try:
-        # Get request data
-        request_data = request.json
-        if not request_data or 'quantity' not in request_data:
-            logger.error("Missing quantity in request")
-            return jsonify({"error": "Missing quantity in request"}), 400
-            
-        quantity = int(request_data['quantity'])
         if quantity <= 0:
-            logger.error(f"Invalid quantity: {quantity}")
-            return jsonify({"error": "Quantity must be greater than 0"}), 400
-            
-        # Get the database instance
-        db = current_app.config.get('database')
-        if not db:
-            logger.error("Database not initialized")
-            return jsonify({"error": "Database not initialized"}), 500
-            
-        # Try to get the order first to ensure it exists
-        order = db.get_order(order_id)
-        if not order:
-            logger.error(f"Order with ID {order_id} not found")
-            return jsonify({"error": f"Order with ID {order_id} not found"}), 404
-            
-        # Check if order is in editable state
-        if order['status'] != 'pending':
-            logger.error(f"Cannot update quantity for order with status '{order['status']}'")
-            return jsonify({"error": f"Cannot update quantity for non-pending orders"}), 400
+            logger.error("Invalid quantity: %s", quantity)
+            return error_response('invalid_quantity')
             
-        # Update the order quantity
-        success = db.update_order_quantity(order_id, quantity)
+        # Update the order quantity; only pending orders are editable
+        previous_status = options_service.db.update_order_quantity_if_pending(order_id, quantity)
+        if previous_status is None:
+            logger.error("Order with ID %s not found", order_id)
+            return fast_jsonify({"error": f"Order with ID {order_id} not found"}), 404
         
-        if success:
-            logger.info(f"Order with ID {order_id} quantity updated to {quantity}")
-            return jsonify({
-                "success": True, 
-                "message": f"Order quantity updated to {quantity}",
-                "order_id": order_id,
-                "quantity": quantity
-            }), 200
-        else:
-            logger.error(f"Failed to update quantity for order with ID {order_id}")
-            return jsonify({"error": "Failed to update order quantity"}), 500
-            
-    except ValueError as ve:
-        logger.error(f"Invalid quantity value: {str(ve)}")
-        return jsonify({"error": "Invalid quantity value"}), 400
+        if previous_status != 'pending':
+            logger.error("Cannot update quantity for order with status '%s'", previous_status)
+            return error_response('order_not_pending')
+        
+        pending_orders_cache.notify_changed()
+        logger.info("Order with ID %s quantity updated to %s", order_id, quantity)
+        return fast_jsonify({
+            "success": True,
+            "message": f"Order quantity updated to {quantity}",
+            "order_id": order_id,
+            "quantity": quantity
+        }), 200
+    
     except Exception as e:
-        logger.error(f"Error updating order quantity: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({"error": str(e)}), 500
+        logger.exception("Error updating order quantity: %s", e)
+        return fast_jsonify({"error": str(e)}), 500
        
\ No newline at end of file
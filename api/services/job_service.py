@@ -0,0 +1,90 @@
+"""
+Job Service module
+Runs long-running TWS operations in the background and tracks their status
+"""
+
+import logging
+import threading
+import uuid
+import concurrent.futures
+
+logger = logging.getLogger('api.services.jobs')
+
+class JobService:
+    """
+    Service for running TWS operations as background jobs.
+    Job state is stored in the database so that any worker process can report it.
+    """
+    def __init__(self, db, max_workers=1):
+        """
+        Initialize the job service
+        
+        Args:
+            db: Database instance used to store job state
+            max_workers (int): Number of background threads running jobs
+        """
+        self.db = db
+        # A single worker keeps TWS calls serialized, as they were when run inside the request
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='tws-jobs'
+        )
+        self._active = {}  # job_type -> job_id, for jobs that should not run concurrently
+        self._lock = threading.Lock()
+    
+    def submit(self, job_type, func, *args, coalesce=False):
+        """
+        Queue a function to run in the background
+        
+        Args:
+            job_type (str): Kind of job, e.g. 'check_orders'
+            func (callable): Function to run; may return a result dict or a (result, status_code) tuple
+            *args: Arguments passed to func
+            coalesce (bool): Reuse the queued or running job of the same type instead of adding another
+        
+        Returns:
+            str: ID of the job
+        """
+        with self._lock:
+            if coalesce and job_type in self._active:
+                return self._active[job_type]
+            
+            job_id = uuid.uuid4().hex
+            self.db.create_job(job_id, job_type)
+            if coalesce:
+                self._active[job_type] = job_id
+        
+        self._executor.submit(self._run, job_id, job_type, func, *args)
+        logger.info("Queued %s job %s", job_type, job_id)
+        return job_id
+    
+    def _run(self, job_id, job_type, func, *args):
+        """
+        Run a job and store its result
+        """
+        self.db.update_job(job_id, 'running')
+        try:
+            result = func(*args)
+            status_code = 200
+            if isinstance(result, tuple):
+                result, status_code = result
+            self.db.update_job(job_id, 'finished', result=result, status_code=status_code)
+        except Exception as e:
+            logger.exception("Error running %s job %s: %s", job_type, job_id, e)
+            self.db.update_job(job_id, 'failed', result={"error": str(e)}, status_code=500)
+        finally:
+            with self._lock:
+                if self._active.get(job_type) == job_id:
+                    del self._active[job_type]
+    
+    def get_job(self, job_id):
+        """
+        Get the status and result of a job
+        
+        Args:
+            job_id (str): ID of the job
+        
+        Returns:
+            dict: Job data or None if not found
+        """
+        return self.db.get_job(job_id)
@@ -5,21 +5,69 @@ Handles options data retrieval and processing
 
 import logging
 import math
-import random
+import os
 import time
 from datetime import datetime, timedelta, time as datetime_time
-import pandas as pd
-from core.connection import IBConnection, Option, Stock, suppress_ib_logs
+from core.connection import IBConnection, Option, Stock, get_thread_connection, next_client_id, set_thread_connection, suppress_ib_logs
 from core.utils import get_closest_friday, get_next_monthly_expiration, is_market_hours
-from config import Config
+from config import Config, DEFAULT_THREADS, DEFAULT_WORKERS, TWS_MAX_CLIENTS
 from db.database import OptionsDatabase
-import traceback
 import concurrent.futures
-from functools import partial
+from operator import itemgetter
 import json
 
 logger = logging.getLogger('api.services.options')
 
+def otm_worker_count(workers, threads):
+    """
+    Size the OTM loader pool from this process's share of the TWS API clients.
+    Every thread holds at most one connection, shared by all services, so the
+    request threads and the job thread come off the share and the loaders get
+    what is left.
+    
+    Args:
+        workers (int): Number of server processes
+        threads (int): Request threads per process
+        
+    Returns:
+        int: Number of loader threads, between 1 and 4
+    """
+    return max(1, min(4, TWS_MAX_CLIENTS // workers - threads - 1))
+
+OTM_WORKERS = otm_worker_count(int(os.environ.get('WORKERS', DEFAULT_WORKERS)),
+                               int(os.environ.get('THREADS', DEFAULT_THREADS)))
+
+def _adjust_to_standard_strike(price):
+    """
+    Adjust a price to a standard strike price. IBConnection.get_option_chain picks
+    the listed strike closest to this target, so whole dollars are precise enough.
+    
+    Args:
+        price (float): Price to adjust
+        
+    Returns:
+        int: Adjusted standard strike price
+    """
+    return round(price)
+
+_expiration_cache = {}  # date -> closest Friday formatted as YYYYMMDD
+
+def _closest_friday_str():
+    """
+    Get the closest Friday in YYYYMMDD format, computed once per day
+    
+    Returns:
+        str: Expiration date used for OTM option lookups
+    """
+    today = datetime.now().date()
+    expiration = _expiration_cache.get(today)
+    if expiration is None:
+        expiration = get_closest_friday().strftime('%Y%m%d')
+        # Only today's value is ever needed
+        _expiration_cache.clear()
+        _expiration_cache[today] = expiration
+    return expiration
+
 class OptionsService:
     """
     Service for handling options data operations
@@ -27,10 +75,26 @@ class OptionsService:
     def __init__(self):
         self.config = Config()
         logger.info(f"Options service using port: {self.config.get('port')}")
-        self.connection = None
         db_path = self.config.get('db_path')
-        self.db = OptionsDatabase(db_path)
+        self.db = OptionsDatabase.shared(db_path)
         self.portfolio_service = None  # Will be initialized when needed
+        # Persistent pool loading option chains for several tickers at once. Its threads
+        # keep their IB connections between requests, so the handshake is paid only once.
+        self.otm_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=OTM_WORKERS,
+            thread_name_prefix='otm'
+        )
+    
+    @property
+    def connection(self):
+        """
+        IB connection of the current thread, shared with the other services on it
+        """
+        return get_thread_connection()
+    
+    @connection.setter
+    def connection(self, value):
+        set_thread_connection(value)
         
     def _ensure_connection(self):
         """
@@ -53,8 +117,8 @@ class OptionsService:
                     logger.warning("Failed to reconnect with existing client ID, will create new connection")
         
             # No connection or reconnection failed, create a new one
-            # Generate a unique client ID based on current timestamp and random number
-            unique_client_id = int(time.time() % 10000) + random.randint(1000, 9999)
+            # Use a client ID not yet taken by another connection of this process
+            unique_client_id = next_client_id()
             logger.info(f"Creating new TWS connection with client ID: {unique_client_id}")
             
             port = self.config.get('port', 7497)
@@ -81,18 +145,6 @@ class OptionsService:
                 logger.error("Asyncio event loop error - please check connection.py for proper handling")
             return None
         
-    def _adjust_to_standard_strike(self, price):
-        """
-        Adjust a price to a standard strike price
-        
-        Args:
-            price (float): Price to adjust
-            
-        Returns:
-            float: Adjusted standard strike price
-        """
-        return round(price)
-      
     def execute_order(self, order_id, db):
         """
         Execute an order by sending it to TWS
@@ -349,64 +401,42 @@ class OptionsService:
             }, 200
                 
         except Exception as e:
-            logger.error(f"Error executing order: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error executing order: %s", e)
             return {
                 "success": False,
                 "error": str(e)
             }, 500
       
-    def get_otm_options(self, ticker=None, otm_percentage=10, option_type=None):
+    def get_otm_options_single(self, ticker, otm_percentage=10, option_type=None):
         """
-        Get option data based on OTM percentage from current price.
+        Get option data for a single ticker based on OTM percentage from current price.
+        Safe to call from several threads at once; each thread uses its own IB connection.
         
         Args:
-            ticker (str, optional): Stock ticker symbol
+            ticker (str): Stock ticker symbol
             otm_percentage (int, optional): Percentage out of the money
             option_type (str, optional): Type of options to return ('CALL' or 'PUT'), if None returns both
             
         Returns:
-            dict: Options data for the requested ticker
+            dict: Options data for the ticker, or a dict with an 'error' key
         """
-        start_time = time.time()
-        
-        # Validate option_type if provided
-        if option_type and option_type not in ['CALL', 'PUT']:
-            logger.error(f"Invalid option_type: {option_type}. Must be 'CALL' or 'PUT'")
-            return {'error': f"Invalid option_type: {option_type}. Must be 'CALL' or 'PUT'"}
-            
-        # Use _ensure_connection instead of creating a new connection each time
         conn = self._ensure_connection()
         if not conn:
             logger.error("Failed to establish connection to IB")
         
         is_market_open = is_market_hours()
-        logger.info(f"Market is {'open' if is_market_open else 'closed'}, will attempt to get {'real-time' if is_market_open else 'frozen'} data")
-        
-        # If no tickers provided, get them from portfolio
-        tickers = [ticker]
-        if not tickers:
-            logger.info("No tickers found, unable to proceed")
-            return {'error': 'No tickers found for processing'}
-                
-        expiration = get_closest_friday().strftime('%Y%m%d')
-        # Process each ticker
-        result = {}
-        
-        for ticker in tickers:
-            try:
-                ticker_data = self._process_ticker_for_otm(conn, ticker, otm_percentage, expiration, is_market_open, option_type)
-                result[ticker] = ticker_data
-            except Exception as e:
-                logger.error(f"Error processing {ticker} for OTM options: {e}")
-                logger.error(traceback.format_exc())
-                result[ticker] = {"error": str(e)}
-        
-        elapsed = time.time() - start_time
-        logger.info(f"Completed OTM-based options request in {elapsed:.2f}s, is_market_open={is_market_open}, option_type={option_type}")
-        
-        # Return the results
-        return {'data': result}
+        expiration = _closest_friday_str()
+        return self._get_ticker_otm_options(conn, ticker, otm_percentage, expiration, is_market_open, option_type)
+    
+    def _get_ticker_otm_options(self, conn, ticker, otm_percentage, expiration, is_market_open, option_type):
+        """
+        Process a single ticker for OTM options, returning errors as a result entry
+        """
+        try:
+            return self._process_ticker_for_otm(conn, ticker, otm_percentage, expiration, is_market_open, option_type)
+        except Exception as e:
+            logger.exception("Error processing %s for OTM options: %s", ticker, e)
+            return {"error": str(e)}
         
     def _process_ticker_for_otm(self, conn, ticker, otm_percentage, expiration=None, is_market_open=None, option_type=None):
         """
@@ -442,8 +472,7 @@ class OptionsService:
                 else:
                     logger.info(f"Retrieved frozen stock price for {ticker}: ${stock_price}")
             except Exception as e:
-                logger.error(f"Error getting stock price for {ticker}: {e}")
-                logger.error(traceback.format_exc())
+                logger.exception("Error getting stock price for %s: %s", ticker, e)
         
         # If we don't have a valid stock price, return an error
         if stock_price is None or not isinstance(stock_price, (int, float)) or stock_price <= 0:
@@ -461,8 +490,8 @@ class OptionsService:
                 from api.services.portfolio_service import PortfolioService
                 self.portfolio_service = PortfolioService()
             
-            # Get positions from portfolio service
-            positions = self.portfolio_service.get_positions()
+            # Read positions over this thread's connection rather than opening another client
+            positions = self.portfolio_service.get_positions(conn=conn)
             
             # Find the matching ticker in positions
             for pos in positions:
@@ -474,8 +503,7 @@ class OptionsService:
             if position_size == 0:
                 logger.info(f"No position found for {ticker}, using 0 shares")
         except Exception as e:
-            logger.error(f"Error getting position for {ticker}: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error getting position for %s: %s", ticker, e)
         
         # Store position size in result
         result['position'] = position_size
@@ -494,22 +522,18 @@ class OptionsService:
                 put_strike = round(stock_price * (1 - otm_percentage / 100), 2)
                 
                 # Adjust to standard strike increments
-                call_strike = self._adjust_to_standard_strike(call_strike)
-                put_strike = self._adjust_to_standard_strike(put_strike)
-                
-                options = []
+                call_strike = _adjust_to_standard_strike(call_strike)
+                put_strike = _adjust_to_standard_strike(put_strike)
                 
-                # Get call options if requested
+                # Fetch the requested rights together, sharing the stock and chain lookups
+                targets = {}
                 if not option_type or option_type == 'CALL':
-                    call_option = conn.get_option_chain(ticker, expiration, 'C', call_strike)
-                    if call_option:
-                        options.append(call_option)
-                
-                # Get put options if requested
+                    targets['C'] = call_strike
                 if not option_type or option_type == 'PUT':
-                    put_option = conn.get_option_chain(ticker, expiration, 'P', put_strike)
-                    if put_option:
-                        options.append(put_option)
+                    targets['P'] = put_strike
+                
+                option_chain = conn.get_option_chain(ticker, expiration, targets=targets)
+                options = [option_chain] if option_chain else []
                 
                 if options:
                     if is_market_open:
@@ -529,8 +553,7 @@ class OptionsService:
                     else:
                         logger.warning(f"Could not get frozen options chain for {ticker}")
             except Exception as e:
-                logger.error(f"Error getting options chain for {ticker}: {e}")
-                logger.error(traceback.format_exc())
+                logger.exception("Error getting options chain for %s: %s", ticker, e)
         
         # If we couldn't get any options data
         if not options_data:
@@ -584,117 +607,92 @@ class OptionsService:
                 
                 # Process each option in the chain
                 for option in options_list:
-                    try:
-                        # Skip if we're filtering by option type and this doesn't match
-                        current_option_type = option.get('option_type')
-                        if option_type and current_option_type:
-                            if (option_type == 'CALL' and current_option_type != 'CALL') or \
-                               (option_type == 'PUT' and current_option_type != 'PUT'):
-                                continue
-                        
-                        # Calculate ATM factor for Greeks
-                        strike = option.get('strike', 0)
-                        # Handle NaN and missing values
-                        bid = option.get('bid', 0)
-                        ask = option.get('ask', 0)
-                        last = option.get('last', 0)
-                        
-                        # If last is 0 or NaN, use mid price
-                        if last == 0 or isinstance(last, float) and math.isnan(last):
-                            last = (bid + ask) / 2 if bid > 0 or ask > 0 else 0.1
-                        
-                        # Handle NaN values for Greeks
-                        iv = option.get('implied_volatility', 0)
-                        if isinstance(iv, float) and math.isnan(iv):
-                            iv = 0
-                        
-                        delta = option.get('delta', 0)
-                        if isinstance(delta, float) and math.isnan(delta):
-                            delta = 0
-                        
-                        gamma = option.get('gamma', 0)
-                        if isinstance(gamma, float) and math.isnan(gamma):
-                            gamma = 0
-                        
-                        theta = option.get('theta', 0)
-                        if isinstance(theta, float) and math.isnan(theta):
-                            theta = 0
-                        
-                        vega = option.get('vega', 0)
-                        if isinstance(vega, float) and math.isnan(vega):
-                            vega = 0
-                        
-                        open_interest = option.get('open_interest', 0)
-                        if isinstance(open_interest, float) and math.isnan(open_interest):
-                            open_interest = 0
-                        
-                        # Format option data with flattened structure
-                        option_data = {
-                            'symbol': f"{ticker}{option.get('expiration')}{'C' if option.get('option_type') == 'CALL' else 'P'}{int(strike)}",
-                            'strike': strike,
-                            'expiration': option.get('expiration'),
-                            'option_type': option.get('option_type'),
-                            'bid': bid,
-                            'ask': ask,
-                            'last': last,
-                            'open_interest': int(open_interest),
-                            'implied_volatility': round(iv * 100, 2) if iv is not None and iv < 1 and iv > 0 else (0 if iv is None else round(iv, 2)),  # Handle percentage vs decimal
-                            'delta': round(delta, 5) if delta is not None else 0,
-                            'gamma': round(gamma, 5) if gamma is not None else 0,
-                            'theta': round(theta, 5) if theta is not None else 0,
-                            'vega': round(vega, 5) if vega is not None else 0
-                        }
-                        
-                        # Calculate and add flattened earnings data based on option type 
-                        if option.get('option_type') == 'CALL':
-                            position_qty = 100  # Assume 100 shares per standard position
-                            max_contracts = int(position_qty / 100)  # Each contract represents 100 shares
-                            premium_per_contract = last * 100  # Premium per contract (100 shares)
-                            total_premium = premium_per_contract * max_contracts
-                            
-                            # Ensure we don't divide by zero or NaN
-                            if strike > 0 and max_contracts > 0:
-                                return_on_capital = (total_premium / (strike * 100 * max_contracts)) * 100
-                            else:
-                                return_on_capital = 0
-                            
-                            # Add flattened earnings data
-                            option_data['earnings_max_contracts'] = max_contracts
-                            option_data['earnings_premium_per_contract'] = round(premium_per_contract, 2)
-                            option_data['earnings_total_premium'] = round(total_premium, 2)
-                            option_data['earnings_return_on_capital'] = round(return_on_capital, 2)
-                            
-                            # Add to calls list directly
-                            result['calls'].append(option_data)
-                            
-                        elif option.get('option_type') == 'PUT':
-                            position_value = strike * 100 * int(100 / 100)  # Cash needed to secure puts
-                            max_contracts = 1 if strike <= 0 else int(position_value / (strike * 100))
-                            premium_per_contract = last * 100  # Premium per contract
-                            total_premium = premium_per_contract * max_contracts
-                            
-                            # Ensure we don't divide by zero or NaN
-                            if position_value > 0:
-                                return_on_cash = (total_premium / position_value) * 100
-                            else:
-                                return_on_cash = 0
-                            
-                            # Add flattened earnings data
-                            option_data['earnings_max_contracts'] = max_contracts
-                            option_data['earnings_premium_per_contract'] = round(premium_per_contract, 2)
-                            option_data['earnings_total_premium'] = round(total_premium, 2)
-                            option_data['earnings_return_on_cash'] = round(return_on_cash, 2)
-                            
-                            # Add to puts list directly
-                            result['puts'].append(option_data)
+                    get = option.get
+                    current_option_type = get('option_type')
+                    # Skip if we're filtering by option type and this doesn't match
+                    if option_type and current_option_type and option_type != current_option_type:
+                        continue
                     
-                    except Exception as e:
-                        logger.error(f"Error processing individual option in chain for {ticker}: {str(e)}")
-                        logger.error(traceback.format_exc())
+                    # Calculate ATM factor for Greeks
+                    strike = get('strike', 0)
+                    # Options without a usable strike cannot be given a symbol; skip them
+                    if not isinstance(strike, (int, float)) or strike != strike:
+                        continue
+                    expiration = get('expiration')
+                    # Handle NaN and missing values
+                    bid = get('bid', 0)
+                    ask = get('ask', 0)
+                    last = get('last', 0)
+                    
+                    # If last is 0, missing or NaN (the only value not equal to itself), use mid price
+                    if not last or last != last:
+                        last = (bid + ask) * 0.5 if bid > 0 or ask > 0 else 0.1
+                    
+                    # Handle NaN values for Greeks
+                    iv = get('implied_volatility', 0)
+                    if isinstance(iv, float) and math.isnan(iv):
+                        iv = 0
+                    
+                    delta = get('delta', 0)
+                    if isinstance(delta, float) and math.isnan(delta):
+                        delta = 0
+                    
+                    gamma = get('gamma', 0)
+                    if isinstance(gamma, float) and math.isnan(gamma):
+                        gamma = 0
+                    
+                    theta = get('theta', 0)
+                    if isinstance(theta, float) and math.isnan(theta):
+                        theta = 0
+                    
+                    vega = get('vega', 0)
+                    if isinstance(vega, float) and math.isnan(vega):
+                        vega = 0
+                    
+                    open_interest = get('open_interest', 0) or 0
+                    if isinstance(open_interest, float) and math.isnan(open_interest):
+                        open_interest = 0
+                    
+                    type_char = 'C' if current_option_type == 'CALL' else 'P'
+                    symbol = f"{ticker}{expiration}{type_char}{int(strike)}"
+                    
+                    # Format option data with flattened structure
+                    option_data = {
+                        'symbol': symbol,
+                        'strike': strike,
+                        'expiration': expiration,
+                        'option_type': current_option_type,
+                        'bid': bid,
+                        'ask': ask,
+                        'last': last,
+                        'open_interest': int(open_interest),
+                        'implied_volatility': round(iv * 100, 2) if iv is not None and iv < 1 and iv > 0 else (0 if iv is None else round(iv, 2)),  # Handle percentage vs decimal
+                        'delta': round(delta, 5) if delta is not None else 0,
+                        'gamma': round(gamma, 5) if gamma is not None else 0,
+                        'theta': round(theta, 5) if theta is not None else 0,
+                        'vega': round(vega, 5) if vega is not None else 0
+                    }
+                    
+                    # Calculate and add flattened earnings data based on option type.
+                    # Earnings assume a single contract: 100 shares covering a call,
+                    # or the cash securing one put (strike * 100).
+                    premium_per_contract = last * 100
+                    capital = strike * 100
+                    option_data['earnings_max_contracts'] = 1
+                    option_data['earnings_premium_per_contract'] = round(premium_per_contract, 2)
+                    option_data['earnings_total_premium'] = round(premium_per_contract, 2)
+                    return_on_capital = (premium_per_contract / capital) * 100 if capital > 0 else 0
+                    
+                    if current_option_type == 'CALL':
+                        option_data['earnings_return_on_capital'] = round(return_on_capital, 2)
+                        result['calls'].append(option_data)
+                    elif current_option_type == 'PUT':
+                        option_data['earnings_return_on_cash'] = round(return_on_capital, 2)
+                        result['puts'].append(option_data)
             
             # Sort options by strike price
-            result['calls'] = sorted(result['calls'], key=lambda x: x['strike'])
-            result['puts'] = sorted(result['puts'], key=lambda x: x['strike'])
+            result['calls'].sort(key=itemgetter('strike'))
+            result['puts'].sort(key=itemgetter('strike'))
             
             # Final sanitization to ensure no NaN values exist in the result
             self._sanitize_result(result)
@@ -702,8 +700,7 @@ class OptionsService:
             return result
             
         except Exception as e:
-            logger.error(f"Error processing options chain for {ticker}: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error processing options chain for %s: %s", ticker, e)
             return {} 
 
     def _sanitize_result(self, result):
@@ -763,8 +760,7 @@ class OptionsService:
                                 f"Executed={order.get('executed')}, IB ID={order.get('ib_order_id', 'None')}")
                     
             except Exception as db_error:
-                logger.error(f"Error retrieving orders from database: {str(db_error)}")
-                logger.error(traceback.format_exc())
+                logger.exception("Error retrieving orders from database: %s", db_error)
                 return {
                     "success": False,
                     "error": f"Database error: {str(db_error)}"
@@ -846,8 +842,7 @@ class OptionsService:
                                 else:
                                     logger.error(f"Could not find order {order_id} in database after update attempt")
                     except Exception as e:
-                        logger.error(f"Error checking status for order {order_id}: {str(e)}")
-                        logger.error(traceback.format_exc())
+                        logger.exception("Error checking status for order %s: %s", order_id, e)
             
             # Disconnect from TWS
             if conn:
@@ -860,8 +855,7 @@ class OptionsService:
             }
                 
         except Exception as e:
-            logger.error(f"Error checking pending orders: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error checking pending orders: %s", e)
             return {
                 "success": False,
                 "error": str(e)
@@ -970,8 +964,7 @@ class OptionsService:
                                 tws_cancel_success = True
                 
                 except Exception as e:
-                    logger.error(f"Error canceling order in TWS: {str(e)}")
-                    logger.error(traceback.format_exc())
+                    logger.exception("Error canceling order in TWS: %s", e)
                     tws_error_message = f"Error canceling order in TWS: {str(e)}"
                 
                 finally:
@@ -1035,8 +1028,7 @@ class OptionsService:
             }, 200
                 
         except Exception as e:
-            logger.error(f"Error canceling order: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error canceling order: %s", e)
             
             try:
                 # Even in case of unexpected errors, try to mark the order as canceled
@@ -4,9 +4,8 @@ Manages portfolio data and calculations
 """
 
 import logging
-import random
-import time
-from core.connection import IBConnection
+from datetime import datetime, timedelta
+from core.connection import IBConnection, get_thread_connection, next_client_id, set_thread_connection
 from config import Config
 import traceback
 
@@ -19,7 +18,17 @@ class PortfolioService:
     def __init__(self):
         self.config = Config()
         logger.info(f"Portfolio service using port: {self.config.get('port')}")
-        self.connection = None
+    
+    @property
+    def connection(self):
+        """
+        IB connection of the current thread, shared with the other services on it
+        """
+        return get_thread_connection()
+    
+    @connection.setter
+    def connection(self, value):
+        set_thread_connection(value)
         
     def _ensure_connection(self):
         """
@@ -27,9 +36,8 @@ class PortfolioService:
         """
         try:
             if self.connection is None or not self.connection.is_connected():
-                # Generate a unique client ID based on current timestamp and random number
-                # to avoid conflicts with other connections
-                unique_client_id = int(time.time() % 10000) + random.randint(1000, 9999)
+                # Use a client ID not yet taken by another connection of this process
+                unique_client_id = next_client_id()
                 logger.info(f"Creating new TWS connection with client ID: {unique_client_id}")
                 
                 # Create new connection
@@ -85,18 +93,19 @@ class PortfolioService:
             logger.error(traceback.format_exc())
             return None
     
-    def get_positions(self, security_type=None):
+    def get_positions(self, security_type=None, conn=None):
         """
         Get portfolio positions, optionally filtered by security type
         
         Args:
             security_type (str, optional): Filter by security type (e.g., 'STK', 'OPT')
+            conn (IBConnection, optional): Connected IB connection to use instead of this service's own
             
         Returns:
             list: List of position dictionaries
         """
         try:
-            conn = self._ensure_connection()
+            conn = conn or self._ensure_connection()
             if not conn:
                 logger.error("No connection available for positions.")
                 return []
@@ -108,22 +117,22 @@ class PortfolioService:
             # Convert positions dict to list format expected by the API
             positions_list = []
             for key, pos in positions.items():
-                contract = pos.get('contract')
+                contract = pos.contract
                 if not contract:
                     continue
                 
                 # Skip if filtering by security type and this doesn't match
-                pos_type = pos.get('security_type', '')
+                pos_type = pos.security_type
                 if security_type and pos_type != security_type:
                     continue
                 # Build position dictionary
                 position_data = {
                     'symbol': contract.symbol if hasattr(contract, 'symbol') else '',
-                    'position': pos.get('shares', 0),
-                    'market_price': pos.get('market_price', 0),
-                    'market_value': pos.get('market_value', 0),
-                    'avg_cost': pos.get('avg_cost', 0),
-                    'unrealized_pnl': pos.get('unrealized_pnl', 0),
+                    'position': pos.shares,
+                    'market_price': pos.market_price,
+                    'market_value': pos.market_value,
+                    'avg_cost': pos.avg_cost,
+                    'unrealized_pnl': pos.unrealized_pnl,
                     'security_type': pos_type
                 }
                 
@@ -160,7 +169,6 @@ class PortfolioService:
             positions = self.get_positions('OPT')  # Just option positions
             
             # Filter for short option positions expiring this week
-            from datetime import datetime, timedelta
             today = datetime.now()
             # Calculate the end of the week (next Friday if today is after Friday)
             days_until_friday = (4 - today.weekday()) % 7
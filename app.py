@@ -7,6 +7,7 @@ import os
 import json
 from flask import Flask, render_template, request, redirect, url_for, jsonify
 from api import create_app
+from api.routes import options as options_routes
 from core.logging_config import get_logger
 from db.database import OptionsDatabase
 from core.connection import IBConnection, suppress_ib_logs
@@ -33,8 +34,9 @@ def create_application():
                 # Initialize the database
                 db_path = connection_config['db_path']
                 logger.info(f"Initializing database at {db_path}")
-                options_db = OptionsDatabase(db_path)
+                options_db = OptionsDatabase.shared(db_path)
                 app.config['database'] = options_db
+                options_routes.init_database(options_db)
         except Exception as e:
             logger.error(f"Error loading connection configuration: {str(e)}")
             # Use default values
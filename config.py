@@ -4,6 +4,14 @@ import logging
 
 logger = logging.getLogger('autotrader.config')
 
+# Server sizing used when WORKERS / THREADS are not set in the environment.
+# One of the threads is kept for the pending order stream.
+DEFAULT_WORKERS = 4
+DEFAULT_THREADS = 3
+
+# TWS accepts about 32 API clients across all server processes
+TWS_MAX_CLIENTS = 32
+
 class Config:
     """
     Configuration class for the AutoTrader application
@@ -4,14 +4,17 @@ Stock and Options Trading Connection Module for Interactive Brokers
 
 import logging
 import asyncio
+import bisect
+import itertools
 import math
+import operator
 import time
 import os
 import json
 import threading
 import traceback
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
-from datetime import datetime
 import pytz
 from core.utils import is_market_hours
 
@@ -24,32 +27,131 @@ from core.logging_config import get_logger
 # Configure logging
 logger = get_logger('autotrader.connection', 'tws')
 
-# Set ib_insync logger to WARNING level to reduce noise
+# Loggers of ib_insync and the lower-level modules it uses, all set to WARNING to reduce noise
+_IB_LOGGER_NAMES = (
+    # Base ib_insync loggers
+    'ib_insync',
+    'ib_insync.wrapper',
+    'ib_insync.client',
+    'ib_insync.ticker',
+    # Additional ib_insync logger components
+    'ib_insync.event',
+    'ib_insync.util',
+    'ib_insync.objects',
+    'ib_insync.contract',
+    'ib_insync.order',
+    'ib_insync.ib',
+    # Related lower-level modules used by ib_insync
+    'asyncio',
+    'eventkit',
+)
+_ib_logs_suppressed = False
+
 def suppress_ib_logs():
     """
-    Suppress verbose logs from the ib_insync library by setting higher log levels
+    Suppress verbose logs from the ib_insync library by setting higher log levels.
+    Only the first call does any work, so callers need not track whether it already ran.
     """
-    # Base ib_insync loggers
-    logging.getLogger('ib_insync').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.wrapper').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.client').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.ticker').setLevel(logging.WARNING)
-    
-    # Additional ib_insync logger components
-    logging.getLogger('ib_insync.event').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.util').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.objects').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.contract').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.order').setLevel(logging.WARNING)
-    logging.getLogger('ib_insync.ib').setLevel(logging.WARNING)
-    
-    # Suppress related lower-level modules used by ib_insync
-    logging.getLogger('asyncio').setLevel(logging.WARNING)
-    logging.getLogger('eventkit').setLevel(logging.WARNING)
+    global _ib_logs_suppressed
+    if _ib_logs_suppressed:
+        return
+    for name in _IB_LOGGER_NAMES:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    _ib_logs_suppressed = True
     
 # Call to suppress IB logs
 suppress_ib_logs()
 
+# Number of qualified contracts kept per connection
+QUALIFIED_CACHE_SIZE = 1024
+
+# Option chain definitions (expirations and strikes) barely change during the day,
+# so they are shared by all connections of the process for a few minutes
+OPTION_CHAIN_CACHE_TTL = 300  # seconds
+OPTION_CHAIN_CACHE_SIZE = 256
+_option_chain_cache = {}  # conId -> (expires_at, chains)
+_option_chain_cache_lock = threading.Lock()
+
+# Account summary tags read by get_portfolio, mapped to their account info fields
+ACCOUNT_SUMMARY_FIELDS = {
+    'TotalCashValue': 'available_cash',
+    'NetLiquidation': 'account_value',
+    'ExcessLiquidity': 'excess_liquidity',
+    'FullInitMarginReq': 'initial_margin',
+}
+
+# Option type spellings accepted by create_option_contract, mapped to the IB right
+_OPTION_RIGHTS = {'C': 'C', 'CALL': 'C', 'P': 'P', 'PUT': 'P'}
+
+# OrderStatus fields reported by place_order, read in one call, and their result keys
+_ORDER_STATUS_KEYS = ('order_id', 'status', 'filled', 'remaining', 'avg_fill_price', 'perm_id',
+                      'last_fill_price', 'client_id', 'why_held', 'market_cap')
+_get_order_status = operator.attrgetter('orderId', 'status', 'filled', 'remaining', 'avgFillPrice', 'permId',
+                                        'lastFillPrice', 'clientId', 'whyHeld', 'mktCapPrice')
+
+# Client IDs handed out to new connections. Seeding from the PID keeps the
+# workers of one server apart, and the counter never repeats within a process.
+_client_ids = itertools.count(start=(os.getpid() * 37) % 10000)
+
+# IB connection of each thread, shared by all services running on that thread so a
+# thread holds one TWS client. ib_insync connections are bound to the event loop of
+# the thread that created them, so they cannot be shared between threads.
+_thread_connections = threading.local()
+
+def get_thread_connection():
+    """
+    Get the IB connection of the current thread
+    
+    Returns:
+        IBConnection: Connection created on this thread, or None
+    """
+    return getattr(_thread_connections, 'connection', None)
+
+def set_thread_connection(connection):
+    """
+    Set the IB connection of the current thread
+    
+    Args:
+        connection (IBConnection): Connection created on this thread
+    """
+    _thread_connections.connection = connection
+
+def next_client_id():
+    """
+    Get a client ID for a new TWS connection that is not used by this process yet
+    
+    Returns:
+        int: Client ID between 1 and 30000
+    """
+    return next(_client_ids) % 30000 + 1
+
+def _positive(value):
+    """
+    Normalize a ticker field: IB reports missing values as NaN or -1, which become 0
+    
+    Args:
+        value (float): Raw ticker value, possibly None or NaN
+        
+    Returns:
+        float: The value if it is positive, otherwise 0
+    """
+    return value if value and value > 0 else 0
+
+
+@dataclass(slots=True)
+class Position:
+    """
+    A portfolio position as returned by IBConnection.get_portfolio
+    """
+    shares: float
+    avg_cost: float
+    market_price: float
+    market_value: float
+    unrealized_pnl: float
+    realized_pnl: float
+    contract: Contract
+    security_type: str
+
 
 class IBConnection:
     """
@@ -73,25 +175,28 @@ class IBConnection:
         self.readonly = readonly
         self.ib = IB()
         self._connected = False
-        
-        # Suppress ib_insync logs when initializing
-        suppress_ib_logs()
+        self._qualified_cache = {}  # contract key -> qualified contract
+        self._market_data_type = None  # type last requested on this connection
+        # Keep the connection flag current so is_connected needs no socket check
+        self.ib.disconnectedEvent += self._on_disconnect
     
     def _ensure_event_loop(self):
         """
-        Ensure that an event loop exists for the current thread
+        Ensure that an event loop exists for the current thread. The loop is created
+        once and then kept for the life of the thread, since a connection made on it
+        stays bound to it.
+        
+        Returns:
+            asyncio.AbstractEventLoop: Event loop of the current thread
         """
         try:
-            # Check if an event loop exists and is running
-            loop = asyncio.get_event_loop()
-            if not loop.is_running():
-                pass  # Loop exists but not running, which is fine
+            return asyncio.get_event_loop()
         except RuntimeError:
             # No event loop exists in this thread, create one
             logger.debug("Creating new event loop for thread")
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-        return True
+            return loop
     
     def connect(self):
         """
@@ -100,9 +205,6 @@ class IBConnection:
         Returns:
             bool: True if successful, False otherwise
         """
-        # Suppress logs during connection attempt
-        suppress_ib_logs()
-        
         try:
             if self._connected and self.ib.isConnected():
                 logger.info(f"Already connected to IB")
@@ -145,9 +247,82 @@ class IBConnection:
         Disconnect from Interactive Brokers
         """
         if self._connected:
-            self.ib.disconnect()
+            # Cleared first, so _on_disconnect does not report this as an unexpected close
             self._connected = False
+            self.ib.disconnect()
             logger.info("Disconnected from IB")
+        self._qualified_cache.clear()
+    
+    def _wait_for(self, condition, timeout):
+        """
+        Process incoming TWS messages until condition is met or timeout expires.
+        Returns as soon as an update satisfies the condition instead of polling
+        at a fixed interval.
+        
+        Args:
+            condition (callable): Function returning True once the awaited data has arrived
+            timeout (float): Maximum number of seconds to wait
+            
+        Returns:
+            bool: True if the condition was met, False on timeout
+        """
+        deadline = time.monotonic() + timeout
+        while not condition():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.ib.waitOnUpdate(timeout=remaining)
+        return True
+    
+    @staticmethod
+    def _stock_key(symbol, exchange='SMART'):
+        """
+        Build the cache key identifying a USD stock contract
+        """
+        return ('STK', symbol, exchange, '', 0.0, '')
+    
+    @staticmethod
+    def _option_key(symbol, expiration, strike, right, exchange='SMART'):
+        """
+        Build the cache key identifying a USD option contract
+        """
+        return ('OPT', symbol, exchange, expiration, float(strike), right)
+    
+    @staticmethod
+    def _build_contract(key):
+        """
+        Create the unqualified contract described by a cache key
+        """
+        sec_type, symbol, exchange, expiration, strike, right = key
+        if sec_type == 'STK':
+            return Stock(symbol, exchange, 'USD')
+        return Option(symbol=symbol, lastTradeDateOrContractMonth=expiration, strike=strike, right=right, exchange=exchange, currency='USD', multiplier=100)
+    
+    def _qualify(self, *keys):
+        """
+        Get qualified contracts, reusing contracts already qualified on this connection.
+        Contract objects are only created for keys not seen before, and those are sent
+        to TWS in a single request.
+        
+        Args:
+            *keys: Contract keys from _stock_key or _option_key
+            
+        Returns:
+            list: Qualified contract for each key, or None where qualification failed
+        """
+        # Each missing contract is requested once, however often its key repeats
+        missing = list(dict.fromkeys(key for key in keys if key not in self._qualified_cache))
+        
+        if missing:
+            contracts = [self._build_contract(key) for key in missing]
+            self.ib.qualifyContracts(*contracts)
+            for key, contract in zip(missing, contracts):
+                if contract.conId:
+                    if len(self._qualified_cache) >= QUALIFIED_CACHE_SIZE:
+                        del self._qualified_cache[next(iter(self._qualified_cache))]
+                    self._qualified_cache[key] = contract
+        
+        return [self._qualified_cache.get(key) for key in keys]
     
     def is_connected(self):
         """
@@ -156,7 +331,17 @@ class IBConnection:
         Returns:
             bool: True if connected, False otherwise
         """
-        return self._connected and self.ib.isConnected()
+        return self._connected
+    
+    def _on_disconnect(self):
+        """
+        Handle the connection to TWS being closed, by us or by TWS
+        """
+        if self._connected:
+            logger.warning("Connection to IB was closed")
+        self._connected = False
+        # A new connection starts with the TWS default type again
+        self._market_data_type = None
     
     def get_stock_price(self, symbol):
         """
@@ -168,10 +353,28 @@ class IBConnection:
         Returns:
             float: Current stock price or None if error
         """
+        return self.get_stock_prices([symbol]).get(symbol)
+    
+    def get_stock_prices(self, symbols):
+        """
+        Get the current prices of several stocks. All contracts are qualified and
+        subscribed together, so the wait for market data is shared instead of paid
+        once per symbol.
+        
+        Args:
+            symbols (list): Stock symbols
+            
+        Returns:
+            dict: Map of symbol to current price, or None for symbols without a price
+        """
+        # Repeated symbols share one subscription and one entry in the result
+        symbols = list(dict.fromkeys(symbols))
+        prices = dict.fromkeys(symbols)
+        
         if not self.is_connected():
             logger.warning("Not connected to IB. Attempting to connect...")
             if not self.connect():
-                return None
+                return prices
         
         try:
             # Ensure event loop exists for this thread
@@ -182,74 +385,60 @@ class IBConnection:
             
             if not is_market_open:
                 # Use frozen data when market is closed
-                logger.info(f"Market is closed. Setting market data type to FROZEN for stock {symbol}")
+                logger.info(f"Market is closed. Setting market data type to FROZEN for stocks {symbols}")
                 self.set_market_data_type(2)  # 2 = Frozen
             else:
                 # Use live data when market is open
-                logger.info(f"Market is open. Setting market data type to LIVE for stock {symbol}")
+                logger.info(f"Market is open. Setting market data type to LIVE for stocks {symbols}")
                 self.set_market_data_type(1)  # 1 = Live
             
-            # Create a stock contract
-            contract = Contract(symbol=symbol, secType='STK', exchange='SMART', currency='USD')
-            
-            # Qualify the contract
-            qualified_contracts = self.ib.qualifyContracts(contract)
-            if not qualified_contracts:
-                logger.error(f"Failed to qualify contract for {symbol}")
-                return None
-            
-            qualified_contract = qualified_contracts[0]
-            
-            # Request market data
-            ticker = self.ib.reqMktData(qualified_contract)
-            
-            for _ in range(10):
-                self.ib.sleep(0.1)
-                if ticker.marketPrice() is not None and ticker.marketPrice() > 0:
-                    break
-            
-            # Get the last price
-            last_price = ticker.last if ticker.last else (ticker.close if ticker.close else None)
-            bid_price = ticker.bid if ticker.bid else None
-            ask_price = ticker.ask if ticker.ask else None
-            last_rth_trade = ticker.lastRTHTrade.price if hasattr(ticker, 'lastRTHTrade') and ticker.lastRTHTrade else None
-            
-            # If no last price is available, check other prices
-            if last_price is None:
-                if bid_price and ask_price:
-                    # Use midpoint of bid-ask spread
-                    last_price = (bid_price + ask_price) / 2
-                elif bid_price:
-                    last_price = bid_price
-                elif ask_price:
-                    last_price = ask_price
-                elif last_rth_trade:
-                    last_price = last_rth_trade
-            
-            # Cancel the market data subscription
-            self.ib.cancelMktData(qualified_contract)
-            
-            if last_price is None:
-                logger.error(f"Could not get price for {symbol}")
-                return None
+            # Create and qualify the stock contracts in one batch
+            contracts = self._qualify(*[self._stock_key(symbol) for symbol in symbols])
+            
+            # Request market data for every qualified contract before waiting
+            tickers = []
+            for symbol, contract in zip(symbols, contracts):
+                if contract is None:
+                    logger.error(f"Failed to qualify contract for {symbol}")
+                    continue
+                tickers.append((symbol, contract, self.ib.reqMktData(contract)))
+            
+            self._wait_for(lambda: all(ticker.marketPrice() is not None and ticker.marketPrice() > 0 for _, _, ticker in tickers), timeout=1)
+            
+            for symbol, contract, ticker in tickers:
+                # Get the last price
+                last_price = ticker.last if ticker.last else (ticker.close if ticker.close else None)
+                bid_price = ticker.bid if ticker.bid else None
+                ask_price = ticker.ask if ticker.ask else None
+                last_rth_trade = ticker.lastRTHTrade.price if hasattr(ticker, 'lastRTHTrade') and ticker.lastRTHTrade else None
+                
+                # If no last price is available, check other prices
+                if last_price is None:
+                    if bid_price and ask_price:
+                        # Use midpoint of bid-ask spread
+                        last_price = (bid_price + ask_price) / 2
+                    elif bid_price:
+                        last_price = bid_price
+                    elif ask_price:
+                        last_price = ask_price
+                    elif last_rth_trade:
+                        last_price = last_rth_trade
+                
+                # Cancel the market data subscription
+                self.ib.cancelMktData(contract)
                 
-            return last_price
+                if last_price is None:
+                    logger.error(f"Could not get price for {symbol}")
+                
+                prices[symbol] = last_price
+            
+            return prices
             
         except Exception as e:
-            error_msg = str(e)
-            if "There is no current event loop" in error_msg:
-                logger.error("Asyncio event loop error in get_stock_price. Retrying with new event loop.")
-                # Try one more time with a fresh event loop
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    return self.get_stock_price(symbol)
-                except Exception as retry_error:
-                    logger.error(f"Failed to get stock price after event loop retry: {str(retry_error)}")
-                    return None
-            else:
-                logger.error(f"Error getting {symbol} price: {error_msg}")
-            return None
+            # No retry on a fresh event loop: the connection is bound to the thread's
+            # existing loop and would not work on a new one
+            logger.error(f"Error getting {symbols} prices: {e}")
+            return prices
   
     def set_market_data_type(self, data_type=1):
         """
@@ -269,15 +458,51 @@ class IBConnection:
             if not self.is_connected():
                 logger.warning("Cannot set market data type - not connected")
                 return False
+            
+            # The type stays in effect for the connection, so only changes are sent
+            if data_type == self._market_data_type:
+                return True
                 
             logger.info(f"Setting market data type to {data_type}")
             self.ib.reqMarketDataType(data_type)
+            self._market_data_type = data_type
             return True
         except Exception as e:
             logger.error(f"Error setting market data type: {e}")
             return False
             
-    def get_option_chain(self, symbol, expiration=None, right='C', target_strike=None, exchange='SMART'):
+    def _get_option_chain_params(self, stock):
+        """
+        Get the option chain definitions of a qualified stock, requesting them
+        from TWS only when no recent copy is cached
+        
+        Args:
+            stock (Contract): Qualified stock contract
+            
+        Returns:
+            list: OptionChain objects, one per exchange, with sorted strikes
+        """
+        now = time.monotonic()
+        with _option_chain_cache_lock:
+            entry = _option_chain_cache.get(stock.conId)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        
+        chains = self.ib.reqSecDefOptParams(stock.symbol, '', stock.secType, stock.conId)
+        if chains:
+            # TWS sends strikes in no particular order; sort them once so lookups can bisect
+            chains = [chain._replace(strikes=sorted(chain.strikes)) for chain in chains]
+            with _option_chain_cache_lock:
+                if len(_option_chain_cache) >= OPTION_CHAIN_CACHE_SIZE:
+                    # Drop expired entries first, then the oldest if the cache is still full
+                    for con_id in [key for key, (expires_at, _) in _option_chain_cache.items() if expires_at <= now]:
+                        del _option_chain_cache[con_id]
+                    if len(_option_chain_cache) >= OPTION_CHAIN_CACHE_SIZE:
+                        del _option_chain_cache[next(iter(_option_chain_cache))]
+                _option_chain_cache[stock.conId] = (now + OPTION_CHAIN_CACHE_TTL, chains)
+        return chains
+    
+    def get_option_chain(self, symbol, expiration=None, right='C', target_strike=None, exchange='SMART', targets=None):
         """
         Get option chain for a given symbol, expiration, and right
         
@@ -287,10 +512,15 @@ class IBConnection:
             right (str, optional): Option right - 'C' for calls, 'P' for puts
             target_strike (float, optional): Specific strike price to look for
             exchange (str, optional): Exchange to use
+            targets (dict, optional): Target strike per right, e.g. {'C': 110, 'P': 90}, to fetch
+                several rights with one stock lookup and chain request. Overrides right and target_strike.
             
         Returns:
             dict: Option chain data or None if error
         """
+        if targets is None:
+            targets = {right: target_strike}
+        
         try:
             if not self.is_connected():
                 logger.error(f"Cannot get option chain for {symbol} - not connected")
@@ -308,16 +538,14 @@ class IBConnection:
                 logger.info(f"Market is open. Setting market data type to LIVE for {symbol}")
                 self.set_market_data_type(1)  # 1 = Live
             
-            # Rest of the method remains the same...
-            stock = Stock(symbol, exchange, 'USD')
-            self.ib.qualifyContracts(stock)
+            stock = self._qualify(self._stock_key(symbol, exchange))[0]
+            if stock is None:
+                logger.error(f"Failed to qualify contract for {symbol}")
+                return None
             
             # Get stock price for reference
             ticker = self.ib.reqMktData(stock)
-            for _ in range(10):
-                self.ib.sleep(0.1)
-                if ticker.marketPrice() is not None and ticker.marketPrice() > 0:
-                    break
+            self._wait_for(lambda: ticker.marketPrice() is not None and ticker.marketPrice() > 0, timeout=1)
             
             stock_price = ticker.marketPrice()
             if not stock_price or stock_price <= 0:
@@ -335,7 +563,7 @@ class IBConnection:
             self.ib.cancelMktData(stock)
             
             # Get option chains to find expirations and strikes
-            chains = self.ib.reqSecDefOptParams(stock.symbol, '', stock.secType, stock.conId)
+            chains = self._get_option_chain_params(stock)
             
             if not chains:
                 logger.error(f"No option chains found for {symbol}")
@@ -346,11 +574,11 @@ class IBConnection:
             if not expiration:
                 # Find closest expiration to current date
                 if chain.expirations:
-                    today = datetime.now().strftime('%Y%m%d')
-                    valid_expirations = [exp for exp in chain.expirations if exp >= today]
+                    # YYYYMMDD strings order like the dates they encode
+                    today = time.strftime('%Y%m%d')
+                    expiration = min((exp for exp in chain.expirations if exp >= today), default=None)
                     
-                    if valid_expirations:
-                        expiration = sorted(valid_expirations)[0]
+                    if expiration:
                         logger.info(f"Using expiration {expiration} for {symbol}")
                     else:
                         logger.error(f"No valid expirations found for {symbol}")
@@ -363,38 +591,44 @@ class IBConnection:
                 logger.error(f"No option chain found for {symbol} on exchange {exchange}")
                 return None
             
-            # Get strikes from the chain
-            strikes = chain.strikes if hasattr(chain, 'strikes') and chain.strikes else []
-            
-            # If no strikes available but target_strike provided, use that
-            if not strikes and target_strike is not None:
-                logger.warning(f"No strikes available for {symbol}, using provided target strike: {target_strike}")
-                strikes = [target_strike]
-            # If no strikes available and no target_strike, return error
-            elif not strikes:
-                logger.error(f"No strikes available for {symbol} and no target strike provided")
-                return None
-                
-            # If target_strike is provided, find the closest strike
-            if target_strike is not None and strikes:
-                logger.info(f"Finding strike closest to {target_strike} for {symbol}")
-                closest_strike = min(strikes, key=lambda s: abs(s - target_strike))
-                logger.info(f"Selected strike {closest_strike} (from {len(strikes)} available strikes)")
-                strikes = [closest_strike]
-            
             # Final check to ensure expiration is set
             if not expiration:
                 logger.error(f"No expiration date available for {symbol}")
                 return None
-                
-            # Create option contract for each strike
-            option_contracts = []
             
-            for strike in strikes:
-                contract = Option(symbol=symbol, lastTradeDateOrContractMonth=expiration, strike=strike, right=right, exchange=exchange, currency='USD',multiplier=100)
-                option_contracts.append(contract)
+            # Get strikes from the chain
+            chain_strikes = chain.strikes if hasattr(chain, 'strikes') and chain.strikes else []
+            
+            # Key the option contract for each strike of each requested right
+            option_keys = []
             
-            if not option_contracts:
+            for right, target_strike in targets.items():
+                strikes = chain_strikes
+                
+                # If no strikes available but target_strike provided, use that
+                if not strikes and target_strike is not None:
+                    logger.warning(f"No strikes available for {symbol}, using provided target strike: {target_strike}")
+                    strikes = [target_strike]
+                # If no strikes available and no target_strike, return error
+                elif not strikes:
+                    logger.error(f"No strikes available for {symbol} and no target strike provided")
+                    return None
+                    
+                # If target_strike is provided, find the closest strike
+                if target_strike is not None and strikes:
+                    logger.info(f"Finding strike closest to {target_strike} for {symbol}")
+                    # Strikes are sorted, so the closest one is next to the insertion point
+                    i = bisect.bisect_left(strikes, target_strike)
+                    closest_strike = min(strikes[max(i - 1, 0):i + 1], key=lambda s: abs(s - target_strike))
+                    logger.info(f"Selected strike {closest_strike} (from {len(strikes)} available strikes)")
+                    strikes = [closest_strike]
+                
+                for strike in strikes:
+                    option_keys.append(self._option_key(symbol, expiration, strike, right, exchange))
+            
+            # Skip strikes listed twice, so each contract is subscribed only once
+            option_keys = list(dict.fromkeys(option_keys))
+            if not option_keys:
                 logger.error(f"No option contracts created for {symbol}")
                 return None
             # Get additional data for these contracts
@@ -402,53 +636,52 @@ class IBConnection:
                 'symbol': symbol,
                 'expiration': expiration,  # Just use the first one since we're filtering
                 'stock_price': stock_price,
-                'right': right,
+                'right': ''.join(targets),
                 'options': []
             }
             
-            # Rest of the method remains the same...
-            # Qualify and request market data for each option
-            for contract in option_contracts:
+            # Qualify all contracts in one batch
+            qualified_contracts = []
+            for key, qualified in zip(option_keys, self._qualify(*option_keys)):
+                if qualified is not None:
+                    qualified_contracts.append(qualified)
+                else:
+                    _, _, _, key_expiration, key_strike, key_right = key
+                    logger.warning(f"Could not qualify option contract: {symbol} {key_expiration} {key_strike} {key_right}")
+            
+            # Subscribe to all contracts before waiting, so their data arrives together
+            tickers = []
+            for contract in qualified_contracts:
                 try:
-                    # Qualify the contract
-                    qualified_contracts = self.ib.qualifyContracts(contract)
-                    if not qualified_contracts:
-                        logger.warning(f"Could not qualify option contract: {contract.symbol} {contract.lastTradeDateOrContractMonth} {contract.strike} {contract.right}")
-                        continue
-                    
-                    qualified_contract = qualified_contracts[0]
-                    
                     # Request market data with model computation
-                    ticker = self.ib.reqMktData(qualified_contract, '', True, False)  # Add genericTickList='Greeks' to get Greeks
-                   
-                    # Wait for data to arrive - give more time for Greeks
-                    for _ in range(50):
-                        self.ib.sleep(0.1)
-                        if ticker.modelGreeks is not None and ticker.ask > 0:
-                            break
-                    
+                    tickers.append((contract, self.ib.reqMktData(contract, '', True, False)))
+                except Exception as e:
+                    # One option failing is routine for illiquid strikes; keep the traceback at debug level
+                    logger.error("Error requesting market data for option %s %s %s %s: %s",
+                                 contract.symbol, contract.lastTradeDateOrContractMonth, contract.strike, contract.right, e)
+                    logger.debug("Traceback:", exc_info=True)
+            
+            # Wait for data to arrive - give more time for Greeks
+            self._wait_for(lambda: all(ticker.modelGreeks is not None and ticker.ask > 0 for _, ticker in tickers), timeout=5)
+            
+            for contract, ticker in tickers:
+                try:
                     # Extract market data
-                    bid = ticker.bid if hasattr(ticker, 'bid') and ticker.bid is not None and ticker.bid > 0 else 0
-                    ask = ticker.ask if hasattr(ticker, 'ask') and ticker.ask is not None and ticker.ask > 0 else 0
-                    last = ticker.last if hasattr(ticker, 'last') and ticker.last is not None and ticker.last > 0 else 0
-                    volume = ticker.volume if hasattr(ticker, 'volume') and ticker.volume is not None else 0
-                    open_interest = ticker.openInterest if hasattr(ticker, 'openInterest') and ticker.openInterest is not None else 0
-                    implied_vol = ticker.impliedVolatility if hasattr(ticker, 'impliedVolatility') and ticker.impliedVolatility is not None else 0
+                    bid = _positive(ticker.bid)
+                    ask = _positive(ticker.ask)
+                    last = _positive(ticker.last)
+                    volume = _positive(ticker.volume)
+                    # Ticker has no plain openInterest; options report it per right
+                    open_interest = _positive(ticker.callOpenInterest if contract.right == 'C' else ticker.putOpenInterest)
+                    implied_vol = _positive(ticker.impliedVolatility)
                     
                     # Get real delta from model greeks if available
-                    delta = None
-                    gamma = None
-                    theta = None
-                    vega = None
-                    
-                    if hasattr(ticker, 'modelGreeks') and ticker.modelGreeks:
-                        delta = ticker.modelGreeks.delta if hasattr(ticker.modelGreeks, 'delta') else None
-                        gamma = ticker.modelGreeks.gamma if hasattr(ticker.modelGreeks, 'gamma') else None
-                        theta = ticker.modelGreeks.theta if hasattr(ticker.modelGreeks, 'theta') else None
-                        vega = ticker.modelGreeks.vega if hasattr(ticker.modelGreeks, 'vega') else None
-                        
+                    greeks = ticker.modelGreeks
+                    if greeks:
+                        delta, gamma, theta, vega = greeks.delta, greeks.gamma, greeks.theta, greeks.vega
                         logger.debug(f"Got real greeks for {contract.symbol} {contract.right} {contract.strike}: delta={delta}, gamma={gamma}, theta={theta}, vega={vega}")
                     else:
+                        delta = gamma = theta = vega = None
                         logger.debug(f"No model greeks available for {contract.symbol} {contract.right} {contract.strike}")
                         
                     # Create option data dictionary
@@ -470,21 +703,21 @@ class IBConnection:
                     
                     # Add to the result
                     result['options'].append(option_data)
-                    
-                    # Cancel market data request
-                    self.ib.cancelMktData(qualified_contract)
-        
                 except Exception as e:
-                    logger.error(f"Error getting market data for option {contract.symbol} {contract.lastTradeDateOrContractMonth} {contract.strike} {contract.right}: {e}")
-                    logger.error(traceback.format_exc())
+                    logger.error("Error getting market data for option %s %s %s %s: %s",
+                                 contract.symbol, contract.lastTradeDateOrContractMonth, contract.strike, contract.right, e)
+                    logger.debug("Traceback:", exc_info=True)
+            
+            # Cancel all market data requests in one sweep
+            for contract, _ in tickers:
+                self.ib.cancelMktData(contract)
             
             # Sort options by strike price
             result['options'] = sorted(result['options'], key=lambda x: x['strike'])
             
             return result
         except Exception as e:
-            logger.error(f"Error retrieving option chain for {symbol}: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error retrieving option chain for %s: %s", symbol, e)
             return None
     
     def get_portfolio(self):
@@ -541,15 +774,15 @@ class IBConnection:
                 'leverage_percentage': 0
             }
             
+            # The summary has dozens of tags; stop once all wanted ones were read
+            remaining = len(ACCOUNT_SUMMARY_FIELDS)
             for av in account_values:
-                if av.tag == 'TotalCashValue':
-                    account_info['available_cash'] = float(av.value)
-                elif av.tag == 'NetLiquidation':
-                    account_info['account_value'] = float(av.value)
-                elif av.tag == 'ExcessLiquidity':
-                    account_info['excess_liquidity'] = float(av.value)
-                elif av.tag == 'FullInitMarginReq':
-                    account_info['initial_margin'] = float(av.value)
+                field = ACCOUNT_SUMMARY_FIELDS.get(av.tag)
+                if field is not None:
+                    account_info[field] = float(av.value)
+                    remaining -= 1
+                    if not remaining:
+                        break
             
             # Calculate leverage percentage
             if account_info['account_value'] > 0 and account_info['initial_margin'] > 0:
@@ -564,42 +797,35 @@ class IBConnection:
             option_count = 0
             other_count = 0
             
-            # Import Option class for isinstance check
-            from ib_insync import Option
-            
             for position in portfolio:
                 try:
-                    symbol = position.contract.symbol
+                    contract = position.contract
+                    symbol = contract.symbol
                     position_key = symbol
-                    position_type = 'UNKNOWN'
+                    # secType already tells stocks from options, no isinstance checks needed
+                    position_type = contract.secType
                     
                     # Determine position type and create an appropriate key
-                    if isinstance(position.contract, Stock):
-                        position_type = 'STK'
+                    if position_type == 'STK':
                         stock_count += 1
-                    elif isinstance(position.contract, Option):
-                        position_type = 'OPT'
+                    elif position_type == 'OPT':
                         option_count += 1
                         # For options, create a unique key including strike, expiry, and right
-                        expiry = position.contract.lastTradeDateOrContractMonth
-                        strike = position.contract.strike
-                        right = position.contract.right
-                        position_key = f"{symbol}_{expiry}_{strike}_{right}"
+                        position_key = f"{symbol}_{contract.lastTradeDateOrContractMonth}_{contract.strike}_{contract.right}"
                     else:
-                        position_type = position.contract.secType
                         other_count += 1
                     
                     # Store position data
-                    positions[position_key] = {
-                        'shares': position.position,
-                        'avg_cost': position.averageCost,
-                        'market_price': position.marketPrice,
-                        'market_value': position.marketValue,
-                        'unrealized_pnl': position.unrealizedPNL,
-                        'realized_pnl': position.realizedPNL,
-                        'contract': position.contract,
-                        'security_type': position_type
-                    }
+                    positions[position_key] = Position(
+                        shares=position.position,
+                        avg_cost=position.averageCost,
+                        market_price=position.marketPrice,
+                        market_value=position.marketValue,
+                        unrealized_pnl=position.unrealizedPNL,
+                        realized_pnl=position.realizedPNL,
+                        contract=contract,
+                        security_type=position_type
+                    )
                     
                 except Exception as e:
                     logger.error(f"Error processing position: {str(e)}")
@@ -649,15 +875,19 @@ class IBConnection:
             Option: Contract object ready for use with TWS
         """
         # Normalize option type to standard format
-        if option_type.upper() in ['C', 'CALL']:
-            right = 'C'
-        elif option_type.upper() in ['P', 'PUT']:
-            right = 'P'
-        else:
+        right = _OPTION_RIGHTS.get(option_type.upper())
+        if right is None:
             logger.error(f"Invalid option type: {option_type}")
             return None
             
         try:
+            # Reuse the contract if this connection has already qualified it
+            if currency == 'USD':
+                contract = self._qualified_cache.get(self._option_key(symbol, expiry, strike, right, exchange))
+                if contract is not None:
+                    logger.info(f"Reusing qualified option contract: {symbol} {expiry} {strike} {right}")
+                    return contract
+            
             contract = Option(
                 symbol=symbol, 
                 lastTradeDateOrContractMonth=expiry,
@@ -738,10 +968,6 @@ class IBConnection:
             # Place the order
             trade = self.ib.placeOrder(contract, order)
             
-            # Wait for order acknowledgment (order ID assigned)
-            timeout = 3  # seconds
-            start_time = time.time()
-            
             # Check if we have a valid trade object with orderStatus
             if not hasattr(trade, 'orderStatus'):
                 logger.warning("No orderStatus in trade object, returning basic order data")
@@ -754,23 +980,11 @@ class IBConnection:
                     'avg_fill_price': 0
                 }
                 
-            # Wait for order ID to be assigned
-            while not trade.orderStatus.orderId and time.time() - start_time < timeout:
-                self.ib.waitOnUpdate(timeout=0.1)
+            # Wait for order acknowledgment (order ID assigned), returning as soon as it arrives
+            self._wait_for(lambda: trade.orderStatus.orderId, timeout=3)
                 
-            # Create result dictionary with safe attribute access
-            order_status = {
-                'order_id': getattr(trade.orderStatus, 'orderId', 0),
-                'status': getattr(trade.orderStatus, 'status', 'Submitted'),
-                'filled': getattr(trade.orderStatus, 'filled', 0),
-                'remaining': getattr(trade.orderStatus, 'remaining', getattr(order, 'totalQuantity', 0)),
-                'avg_fill_price': getattr(trade.orderStatus, 'avgFillPrice', 0),
-                'perm_id': getattr(trade.orderStatus, 'permId', 0),
-                'last_fill_price': getattr(trade.orderStatus, 'lastFillPrice', 0),
-                'client_id': getattr(trade.orderStatus, 'clientId', 0),
-                'why_held': getattr(trade.orderStatus, 'whyHeld', ''),
-                'market_cap': getattr(trade.orderStatus, 'mktCapPrice', 0)
-            }
+            # OrderStatus always carries these fields, so they are read without defaults
+            order_status = dict(zip(_ORDER_STATUS_KEYS, _get_order_status(trade.orderStatus)))
             
             logger.info(f"Order placed: {order_status}")
             return order_status
@@ -816,71 +1030,68 @@ class IBConnection:
             
             # Get all open orders
             open_orders = self.ib.openOrders()
-            print(f"open_orders: {open_orders}")
+            logger.debug("Open orders: %s", open_orders)
             
             # Check if order is in open orders
-            for o in open_orders:
-                if hasattr(o, 'orderId') and o.orderId == order_id:
-                    # Check if it's a contract+order tuple or an order with status
-                    if hasattr(o, 'orderStatus'):
-                        logger.info(f"Found open order with ID {order_id}, status: {o.orderStatus.status}")
-                        return {
-                            'status': o.orderStatus.status,
-                            'filled': o.orderStatus.filled,
-                            'remaining': o.orderStatus.remaining,
-                            'avg_fill_price': float(o.orderStatus.avgFillPrice or 0),
-                            'last_fill_price': float(o.orderStatus.lastFillPrice or 0),
-                            'commission': float(o.orderStatus.commission or 0),
-                            'why_held': o.orderStatus.whyHeld
-                        }
-                    else:
-                        # This might be just the order object without status
-                        logger.info(f"Found open order with ID {order_id}, but no status information")
-                        return {
-                            'status': 'Submitted',  # Default status for found orders
-                            'filled': 0,
-                            'remaining': o.totalQuantity if hasattr(o, 'totalQuantity') else 0,
-                            'avg_fill_price': 0,
-                            'last_fill_price': 0,
-                            'commission': 0,
-                            'why_held': ''
-                        }
-            
-            # Check trades for this order ID
-            trades = self.ib.trades()
-            for trade in trades:
-                if hasattr(trade.order, 'orderId') and trade.order.orderId == order_id:
-                    logger.info(f"Found trade with order ID {order_id}, status: {trade.orderStatus.status}")
+            o = next((order for order in open_orders if order.orderId == order_id), None)
+            if o is not None:
+                # Check if it's a contract+order tuple or an order with status
+                if hasattr(o, 'orderStatus'):
+                    logger.info(f"Found open order with ID {order_id}, status: {o.orderStatus.status}")
                     return {
-                        'status': trade.orderStatus.status,
-                        'filled': trade.orderStatus.filled,
-                        'remaining': trade.orderStatus.remaining,
-                        'avg_fill_price': float(trade.orderStatus.avgFillPrice or 0),
-                        'last_fill_price': float(trade.orderStatus.lastFillPrice or 0),
-                        'commission': float(trade.orderStatus.commission or 0),
-                        'why_held': trade.orderStatus.whyHeld
+                        'status': o.orderStatus.status,
+                        'filled': o.orderStatus.filled,
+                        'remaining': o.orderStatus.remaining,
+                        'avg_fill_price': float(o.orderStatus.avgFillPrice or 0),
+                        'last_fill_price': float(o.orderStatus.lastFillPrice or 0),
+                        'commission': float(o.orderStatus.commission or 0),
+                        'why_held': o.orderStatus.whyHeld
                     }
-            
-            # Check execution history if not found in open orders or trades
-            executions = self.ib.executions()
-            for execution in executions:
-                if execution.orderId == order_id:
-                    logger.info(f"Found completed order with ID {order_id}")
-                    # Get commission info from commissions report
-                    commission = 0
-                    for fill in self.ib.fills():
-                        if fill.execution.orderId == order_id:
-                            commission += float(fill.commissionReport.commission or 0)
-                    
-                    # Map to our standard format
+                else:
+                    # This might be just the order object without status
+                    logger.info(f"Found open order with ID {order_id}, but no status information")
                     return {
-                        'status': 'Filled',
-                        'filled': execution.shares,
-                        'remaining': 0,
-                        'avg_fill_price': float(execution.price or 0),
-                        'commission': commission
+                        'status': 'Submitted',  # Default status for found orders
+                        'filled': 0,
+                        'remaining': o.totalQuantity if hasattr(o, 'totalQuantity') else 0,
+                        'avg_fill_price': 0,
+                        'last_fill_price': 0,
+                        'commission': 0,
+                        'why_held': ''
                     }
             
+            # Check trades for this order ID
+            trade = next((t for t in self.ib.trades() if t.order.orderId == order_id), None)
+            if trade is not None:
+                logger.info(f"Found trade with order ID {order_id}, status: {trade.orderStatus.status}")
+                return {
+                    'status': trade.orderStatus.status,
+                    'filled': trade.orderStatus.filled,
+                    'remaining': trade.orderStatus.remaining,
+                    'avg_fill_price': float(trade.orderStatus.avgFillPrice or 0),
+                    'last_fill_price': float(trade.orderStatus.lastFillPrice or 0),
+                    'commission': float(trade.orderStatus.commission or 0),
+                    'why_held': trade.orderStatus.whyHeld
+                }
+            
+            # Check execution history if not found in open orders or trades. Each fill
+            # carries both the execution and its commission report, so one pass finds both.
+            fills = [fill for fill in self.ib.fills() if fill.execution.orderId == order_id]
+            if fills:
+                execution = fills[0].execution
+                logger.info(f"Found completed order with ID {order_id}")
+                # Get commission info from commissions report
+                commission = sum(float(fill.commissionReport.commission or 0) for fill in fills)
+                
+                # Map to our standard format
+                return {
+                    'status': 'Filled',
+                    'filled': execution.shares,
+                    'remaining': 0,
+                    'avg_fill_price': float(execution.price or 0),
+                    'commission': commission
+                }
+            
             # Order not found
             logger.warning(f"Order with ID {order_id} not found")
             return {
@@ -920,19 +1131,11 @@ class IBConnection:
             open_orders = self.ib.openOrders()
             
             # Find the order to cancel
-            order_to_cancel = None
-            for o in open_orders:
-                if hasattr(o, 'orderId') and o.orderId == order_id:
-                    order_to_cancel = o
-                    break
+            order_to_cancel = next((order for order in open_orders if order.orderId == order_id), None)
             
             # If not found in open orders, check trades
             if not order_to_cancel:
-                trades = self.ib.trades()
-                for trade in trades:
-                    if hasattr(trade.order, 'orderId') and trade.order.orderId == order_id:
-                        order_to_cancel = trade.order
-                        break
+                order_to_cancel = next((t.order for t in self.ib.trades() if t.order.orderId == order_id), None)
             
             if not order_to_cancel:
                 logger.warning(f"Order with ID {order_id} not found in open orders or trades")
@@ -4,10 +4,12 @@ Centralized logging configuration module for the Auto-Trader application
 
 import os
 import time
+import atexit
+import queue
 import logging
 import glob
 import heapq
-from logging.handlers import RotatingFileHandler
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from datetime import datetime
 
 # Base directory for logs
@@ -20,6 +22,17 @@ for subdir in ['api', 'tws', 'server', 'general']:
 # Log file name format with timestamp
 TIMESTAMP = datetime.now().strftime('%Y%m%d_%H%M%S')
 
+# Queue listeners writing the records of each configured logger, by logger name
+_listeners = {}
+
+def _stop_listeners():
+    """Flush and stop all queue listeners"""
+    for listener in _listeners.values():
+        listener.stop()
+    _listeners.clear()
+
+atexit.register(_stop_listeners)
+
 def get_log_path(log_type):
     """Get the path for a specific log type with timestamp"""
     return os.path.join(LOGS_DIR, log_type, f"{log_type}_{TIMESTAMP}.log")
@@ -78,6 +91,8 @@ def configure_logging(module_name, log_type=None, console_level=logging.INFO, fi
     # Remove existing handlers if any
     if logger.handlers:
         logger.handlers = []
+    if module_name in _listeners:
+        _listeners.pop(module_name).stop()
     
     # Create formatters
     detailed_formatter = logging.Formatter(
@@ -91,7 +106,6 @@ def configure_logging(module_name, log_type=None, console_level=logging.INFO, fi
     console_handler = logging.StreamHandler()
     console_handler.setLevel(console_level)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
     
     # File handler - we create a new timestamped file for each run 
     # but limit the total number of log files
@@ -99,7 +113,14 @@ def configure_logging(module_name, log_type=None, console_level=logging.INFO, fi
     file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(file_level)
     file_handler.setFormatter(detailed_formatter)
-    logger.addHandler(file_handler)
+    
+    # The logger only puts records on a queue; a listener thread does the console
+    # and file I/O, so request threads never wait on the handlers' locks
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    listener.start()
+    _listeners[module_name] = listener
     
     # Log startup information
     logger.info(f"Logging initialized for {module_name} to {log_file}")
@@ -5,100 +5,305 @@ Database module for SQLite logging of trades
 import sqlite3
 import os
 import json
-from datetime import datetime
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 import traceback
 
+# Shared INSERT for orders. Using the exact same SQL text everywhere lets each
+# pooled connection reuse its cached prepared statement.
+INSERT_ORDER_SQL = '''
+    INSERT INTO orders 
+    (timestamp, ticker, option_type, action, strike, expiration, premium, quantity, 
+     bid, ask, last, delta, gamma, theta, vega, implied_volatility, 
+     open_interest, volume, is_mock,
+     earnings_max_contracts, earnings_premium_per_contract, 
+     earnings_total_premium, earnings_return_on_cash, 
+     earnings_return_on_capital, status, executed)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections shared by all request threads.
+    Connections are opened on demand and kept for reuse instead of paying
+    the open/close cost on every query.
+    """
+    def __init__(self, db_path, pool_size=5, timeout=30):
+        """
+        Initialize the connection pool
+        
+        Args:
+            db_path (str): Path to the SQLite database
+            pool_size (int): Maximum number of idle connections kept for reuse
+            timeout (int): Seconds to wait for a database lock before failing
+        """
+        self.db_path = db_path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+    
+    def _connect(self):
+        """Open a new connection usable from any thread"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # This enables column access by name
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection from the pool, opening a new one if none is idle.
+        Any uncommitted transaction is rolled back before the connection is returned.
+        
+        Yields:
+            sqlite3.Connection: Database connection
+        """
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put_nowait(conn)
+            except (sqlite3.Error, queue.Full):
+                # Pool is full (or the connection is broken), just drop it
+                conn.close()
+    
+    def close(self):
+        """Close all idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
 class OptionsDatabase:
     """
     Class for logging options recommendations to SQLite database
     """
-    def __init__(self, db_name=None):
+    _shared = {}  # db_path -> instance returned by shared()
+    _shared_lock = threading.Lock()
+    
+    @classmethod
+    def shared(cls, db_name=None):
+        """
+        Get the process-wide database instance for a path, creating it on first use.
+        Services and the application share it instead of each opening their own
+        connection pool and re-running the table setup.
+        
+        Args:
+            db_name (str, optional): Path to the SQLite database, as for the constructor
+            
+        Returns:
+            OptionsDatabase: Shared database instance
+        """
+        db_path = Path.cwd() / (db_name or 'options.db')
+        with cls._shared_lock:
+            db = cls._shared.get(db_path)
+            if db is None:
+                db = cls._shared[db_path] = cls(db_name)
+            return db
+    
+    def __init__(self, db_name=None, pool_size=5):
         """
         Initialize the options database
         
         Args:
-            db_path (str, optional): Path to the SQLite database. 
+            db_path (str, optional): Path to the SQLite database.
                                     If None, creates 'options.db' in current directory.
+            pool_size (int, optional): Number of pooled connections kept open for reuse
         """
         if db_name is None:
             db_path = Path.cwd() / 'options.db'
         else:
             db_path = Path.cwd() / db_name
-            
+        
         self.db_path = db_path
+        self._pool = ConnectionPool(db_path, pool_size=pool_size)
         self._create_tables_if_not_exist()
+        
+        # Dedicated read-only connection used to detect changes made through any
+        # other connection, including those of other worker processes
+        self._version_conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._version_lock = threading.Lock()
+        self._seen_data_version = None
+        self._orders_version = None
     
     def _create_tables_if_not_exist(self):
         """Create necessary tables with flattened structure"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create recommendations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS recommendations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                ticker TEXT NOT NULL,
-                option_type TEXT NOT NULL,
-                action TEXT NOT NULL,
-                strike REAL NOT NULL,
-                expiration TEXT NOT NULL,
-                premium REAL,
-                details TEXT
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            
+            # Create recommendations table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS recommendations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    option_type TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    strike REAL NOT NULL,
+                    expiration TEXT NOT NULL,
+                    premium REAL,
+                    details TEXT
+                )
+            ''')
+            
+            # Create orders table with flattened structure 
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS orders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    option_type TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    strike REAL NOT NULL,
+                    expiration TEXT NOT NULL,
+                    premium REAL,
+                    quantity INTEGER DEFAULT 1,
+                    status TEXT DEFAULT 'pending',
+                    executed BOOLEAN DEFAULT 0,
+                    
+                    -- Price data
+                    bid REAL DEFAULT 0,
+                    ask REAL DEFAULT 0,
+                    last REAL DEFAULT 0,
+                    
+                    -- Greeks
+                    delta REAL DEFAULT 0,
+                    gamma REAL DEFAULT 0,
+                    theta REAL DEFAULT 0,
+                    vega REAL DEFAULT 0,
+                    implied_volatility REAL DEFAULT 0,
+                    
+                    -- Market data
+                    open_interest INTEGER DEFAULT 0,
+                    volume INTEGER DEFAULT 0,
+                    is_mock BOOLEAN DEFAULT 0,
+                    
+                    -- Earnings data
+                    earnings_max_contracts INTEGER DEFAULT 0,
+                    earnings_premium_per_contract REAL DEFAULT 0,
+                    earnings_total_premium REAL DEFAULT 0,
+                    earnings_return_on_cash REAL DEFAULT 0,
+                    earnings_return_on_capital REAL DEFAULT 0,
+                    
+                    -- Execution data
+                    ib_order_id TEXT,
+                    ib_status TEXT,
+                    filled INTEGER DEFAULT 0,
+                    remaining INTEGER DEFAULT 0,
+                    avg_fill_price REAL DEFAULT 0
+                )
+            ''')
+            
+            # Create jobs table for background TWS operations
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job_type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    status_code INTEGER,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            
+            # Version of the orders table, shared by all processes using the database.
+            # Triggers bump it on every order write, so writes to other tables such as
+            # jobs leave it unchanged. The epoch tells apart a recreated database file.
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS orders_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    epoch TEXT NOT NULL,
+                    version INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute(
+                'INSERT OR IGNORE INTO orders_version (id, epoch, version) VALUES (1, ?, 0)',
+                (uuid.uuid4().hex[:8],)
             )
-        ''')
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS orders_version_{event.lower()}
+                    AFTER {event} ON orders
+                    BEGIN
+                        UPDATE orders_version SET version = version + 1 WHERE id = 1;
+                    END
+                ''')
+            
+            conn.commit()
+    
+    def orders_version(self):
+        """
+        Get a cheap token that changes whenever the orders table is modified.
+        The counter row is only read again after SQLite's data_version shows a
+        commit by another connection, so unchanged polls query no table.
         
-        # Create orders table with flattened structure 
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT NOT NULL,
-                ticker TEXT NOT NULL,
-                option_type TEXT NOT NULL,
-                action TEXT NOT NULL,
-                strike REAL NOT NULL,
-                expiration TEXT NOT NULL,
-                premium REAL,
-                quantity INTEGER DEFAULT 1,
-                status TEXT DEFAULT 'pending',
-                executed BOOLEAN DEFAULT 0,
-                
-                -- Price data
-                bid REAL DEFAULT 0,
-                ask REAL DEFAULT 0,
-                last REAL DEFAULT 0,
-                
-                -- Greeks
-                delta REAL DEFAULT 0,
-                gamma REAL DEFAULT 0,
-                theta REAL DEFAULT 0,
-                vega REAL DEFAULT 0,
-                implied_volatility REAL DEFAULT 0,
-                
-                -- Market data
-                open_interest INTEGER DEFAULT 0,
-                volume INTEGER DEFAULT 0,
-                is_mock BOOLEAN DEFAULT 0,
-                
-                -- Earnings data
-                earnings_max_contracts INTEGER DEFAULT 0,
-                earnings_premium_per_contract REAL DEFAULT 0,
-                earnings_total_premium REAL DEFAULT 0,
-                earnings_return_on_cash REAL DEFAULT 0,
-                earnings_return_on_capital REAL DEFAULT 0,
-                
-                -- Execution data
-                ib_order_id TEXT,
-                ib_status TEXT,
-                filled INTEGER DEFAULT 0,
-                remaining INTEGER DEFAULT 0,
-                avg_fill_price REAL DEFAULT 0
-            )
-        ''')
+        Returns:
+            str: Version token, the same in every process using this database
+        """
+        with self._version_lock:
+            data_version = self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+            if data_version != self._seen_data_version:
+                epoch, version = self._version_conn.execute(
+                    'SELECT epoch, version FROM orders_version WHERE id = 1'
+                ).fetchone()
+                self._orders_version = f"{epoch}.{version}"
+                self._seen_data_version = data_version
+            return self._orders_version
+    
+    def _order_row(self, order_data, timestamp):
+        """
+        Build the INSERT_ORDER_SQL parameters for an order using flattened structure
         
-        conn.commit()
-        conn.close()
+        Args:
+            order_data (dict): Option order data
+            timestamp (str): Creation timestamp
+            
+        Returns:
+            tuple: Row parameters
+        """
+        return (
+            timestamp,
+            order_data.get('ticker', ''),
+            order_data.get('option_type', ''),
+            order_data.get('action', 'SELL'),  # Default action is sell for options
+            order_data.get('strike', 0),
+            order_data.get('expiration', ''),
+            order_data.get('premium', 0),
+            order_data.get('quantity', 1),
+            # Pricing data
+            order_data.get('bid', 0),
+            order_data.get('ask', 0),
+            order_data.get('last', 0),
+            # Greeks
+            order_data.get('delta', 0),
+            order_data.get('gamma', 0),
+            order_data.get('theta', 0),
+            order_data.get('vega', 0),
+            order_data.get('implied_volatility', 0),
+            # Market data
+            order_data.get('open_interest', 0),
+            order_data.get('volume', 0),
+            order_data.get('is_mock', False),
+            # Earnings data
+            order_data.get('earnings_max_contracts', 0),
+            order_data.get('earnings_premium_per_contract', 0),
+            order_data.get('earnings_total_premium', 0),
+            order_data.get('earnings_return_on_cash', 0),
+            order_data.get('earnings_return_on_capital', 0),
+            'pending',
+            False
+        )
     
     def save_order(self, order_data):
         """
@@ -111,69 +316,50 @@ class OptionsDatabase:
             int: ID of the inserted record
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            # Extract data from order
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            ticker = order_data.get('ticker', '')
-            option_type = order_data.get('option_type', '')
-            action = order_data.get('action', 'SELL')  # Default action is sell for options
-            strike = order_data.get('strike', 0)
-            expiration = order_data.get('expiration', '')
-            premium = order_data.get('premium', 0)
-            quantity = order_data.get('quantity', 1)
-            
-            # Extract pricing data
-            bid = order_data.get('bid', 0)
-            ask = order_data.get('ask', 0)
-            last = order_data.get('last', 0)
-            
-            # Extract greeks
-            delta = order_data.get('delta', 0)
-            gamma = order_data.get('gamma', 0)
-            theta = order_data.get('theta', 0)
-            vega = order_data.get('vega', 0)
-            implied_volatility = order_data.get('implied_volatility', 0)
-            
-            # Extract market data
-            open_interest = order_data.get('open_interest', 0)
-            volume = order_data.get('volume', 0)
-            is_mock = order_data.get('is_mock', False)
-            
-            # Extract earnings data
-            earnings_max_contracts = order_data.get('earnings_max_contracts', 0)
-            earnings_premium_per_contract = order_data.get('earnings_premium_per_contract', 0)
-            earnings_total_premium = order_data.get('earnings_total_premium', 0)
-            earnings_return_on_cash = order_data.get('earnings_return_on_cash', 0)
-            earnings_return_on_capital = order_data.get('earnings_return_on_capital', 0)
-            
-            # Insert order with all fields using the flattened structure
-            cursor.execute('''
-                INSERT INTO orders 
-                (timestamp, ticker, option_type, action, strike, expiration, premium, quantity, 
-                 bid, ask, last, delta, gamma, theta, vega, implied_volatility, 
-                 open_interest, volume, is_mock,
-                 earnings_max_contracts, earnings_premium_per_contract, 
-                 earnings_total_premium, earnings_return_on_cash, 
-                 earnings_return_on_capital, status, executed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                timestamp, ticker, option_type, action, strike, expiration, premium, quantity, 
-                bid, ask, last, delta, gamma, theta, vega, implied_volatility, 
-                open_interest, volume, is_mock,
-                earnings_max_contracts, earnings_premium_per_contract, 
-                earnings_total_premium, earnings_return_on_cash, 
-                earnings_return_on_capital, 'pending', False
-            ))
-            
-            record_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
-            
-            return record_id
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                
+                # Insert order with all fields using the flattened structure
+                cursor.execute(INSERT_ORDER_SQL, self._order_row(order_data, timestamp))
+                
+                record_id = cursor.lastrowid
+                conn.commit()
+                
+                return record_id
         except Exception as e:
             print(f"Error saving order: {str(e)}")
             return None
+    
+    def save_orders_bulk(self, orders):
+        """
+        Save several option orders in a single transaction
+        
+        Args:
+            orders (list): List of option order data dicts
+            
+        Returns:
+            list: IDs of the inserted records, in the same order, or None on error
+        """
+        if not orders:
+            return []
+        
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                
+                cursor.executemany(INSERT_ORDER_SQL, [self._order_row(order_data, timestamp) for order_data in orders])
+                
+                # The transaction holds the write lock, so the new AUTOINCREMENT
+                # IDs are consecutive and end at last_insert_rowid()
+                last_id = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+                conn.commit()
+                
+                return list(range(last_id - len(orders) + 1, last_id + 1))
+        except Exception as e:
+            print(f"Error saving orders: {str(e)}")
+            return None
             
     
     def get_pending_orders(self, executed=False, limit=50):
@@ -212,72 +398,71 @@ class OptionsDatabase:
             #if execution_details:
                 #print(f"DEBUG: Execution details: {json.dumps(execution_details, indent=2)}")
                 
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Start with basic update query
-            update_query = '''
-                UPDATE orders
-                SET status = ?, executed = ?
-                WHERE id = ?
-            '''
-            params = [status, executed]
-            
-            # If we have execution details, update those fields too
-            if execution_details and isinstance(execution_details, dict):
-                set_clauses = []
-                
-                # Map execution details to database fields
-                field_mappings = {
-                    'ib_order_id': 'ib_order_id',
-                    'ib_status': 'ib_status',
-                    'filled': 'filled',
-                    'remaining': 'remaining',
-                    'avg_fill_price': 'avg_fill_price',
-                    'is_mock': 'is_mock'
-                }
-                
-                # Check for each field in the mapping
-                for api_field, db_field in field_mappings.items():
-                    if api_field in execution_details:
-                        set_clauses.append(f"{db_field} = ?")
-                        params.append(execution_details[api_field])
-                
-                params.append(order_id)
-                # If we have additional fields to set, add them to the query
-                if set_clauses:
-                    # Reconstruct the query with the additional fields
-                    update_query = '''
-                        UPDATE orders
-                        SET status = ?, executed = ?, {}
-                        WHERE id = ?
-                    '''.format(', '.join(set_clauses))
-            
-            #print(f"DEBUG: SQL Query: {update_query}")
-            #print(f"DEBUG: Query parameters: {params}")
-            
-            # Execute the query
-            cursor.execute(update_query, params)
-            
-            # Check if any rows were affected
-            affected_rows = cursor.rowcount
-            print(f"DEBUG: Affected rows: {affected_rows}")
-            
-            conn.commit()
-            print(f"DEBUG: Changes committed to database.")
-            
-            # Verify the update by reading the order back
-            verification_cursor = conn.cursor()
-            verification_cursor.execute("SELECT status, executed FROM orders WHERE id = ?", (order_id,))
-            verification_result = verification_cursor.fetchone()
-            if verification_result:
-                print(f"DEBUG: Verification - Status: {verification_result[0]}, Executed: {verification_result[1]}")
-            else:
-                print(f"DEBUG: Verification failed - order {order_id} not found after update")
-                
-            conn.close()
-            
-            return affected_rows > 0
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Start with basic update query
+                update_query = '''
+                    UPDATE orders
+                    SET status = ?, executed = ?
+                    WHERE id = ?
+                '''
+                params = [status, executed]
+                
+                # If we have execution details, update those fields too
+                if execution_details and isinstance(execution_details, dict):
+                    set_clauses = []
+                    
+                    # Map execution details to database fields
+                    field_mappings = {
+                        'ib_order_id': 'ib_order_id',
+                        'ib_status': 'ib_status',
+                        'filled': 'filled',
+                        'remaining': 'remaining',
+                        'avg_fill_price': 'avg_fill_price',
+                        'is_mock': 'is_mock'
+                    }
+                    
+                    # Check for each field in the mapping
+                    for api_field, db_field in field_mappings.items():
+                        if api_field in execution_details:
+                            set_clauses.append(f"{db_field} = ?")
+                            params.append(execution_details[api_field])
+                    
+                    params.append(order_id)
+                    # If we have additional fields to set, add them to the query
+                    if set_clauses:
+                        # Reconstruct the query with the additional fields
+                        update_query = '''
+                            UPDATE orders
+                            SET status = ?, executed = ?, {}
+                            WHERE id = ?
+                        '''.format(', '.join(set_clauses))
+                
+                #print(f"DEBUG: SQL Query: {update_query}")
+                #print(f"DEBUG: Query parameters: {params}")
+                
+                # Execute the query
+                cursor.execute(update_query, params)
+                
+                # Check if any rows were affected
+                affected_rows = cursor.rowcount
+                print(f"DEBUG: Affected rows: {affected_rows}")
+                
+                conn.commit()
+                print(f"DEBUG: Changes committed to database.")
+                
+                # Verify the update by reading the order back
+                verification_cursor = conn.cursor()
+                verification_cursor.execute("SELECT status, executed FROM orders WHERE id = ?", (order_id,))
+                verification_result = verification_cursor.fetchone()
+                if verification_result:
+                    print(f"DEBUG: Verification - Status: {verification_result[0]}, Executed: {verification_result[1]}")
+                else:
+                    print(f"DEBUG: Verification failed - order {order_id} not found after update")
+                    
+                
+                return affected_rows > 0
         except Exception as e:
             print(f"ERROR: Error updating order status: {str(e)}")
             print(f"ERROR: {traceback.format_exc()}")
@@ -294,22 +479,21 @@ class OptionsDatabase:
             bool: True if successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                DELETE FROM orders
-                WHERE id = ?
-            ''', (order_id,))
-            
-            # Check if any rows were affected
-            affected_rows = cursor.rowcount
-            
-            conn.commit()
-            conn.close()
-            
-            # Return True if at least one row was deleted
-            return affected_rows > 0
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    DELETE FROM orders
+                    WHERE id = ?
+                ''', (order_id,))
+                
+                # Check if any rows were affected
+                affected_rows = cursor.rowcount
+                
+                conn.commit()
+                
+                # Return True if at least one row was deleted
+                return affected_rows > 0
         except Exception as e:
             print(f"Error deleting order: {str(e)}")
             return False
@@ -326,54 +510,111 @@ class OptionsDatabase:
             bool: True if update was successful, False otherwise
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Get current order to validate it exists and check its status
+                cursor.execute('''
+                    SELECT status FROM orders
+                    WHERE id = ?
+                ''', (order_id,))
+                
+                order = cursor.fetchone()
+                if not order:
+                    print(f"No order found with ID {order_id}")
+                    return False
+                
+                # Only update if the order is in 'pending' status
+                if order[0] != 'pending':
+                    print(f"Cannot update quantity for order with status '{order[0]}'")
+                    return False
+                
+                # Update the order quantity
+                cursor.execute('''
+                    UPDATE orders 
+                    SET quantity = ?,
+                        timestamp = ?
+                    WHERE id = ?
+                ''', (quantity, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), order_id))
+                
+                # Check if any rows were updated
+                affected_rows = cursor.rowcount
+                
+                conn.commit()
+                
+                if affected_rows > 0:
+                    print(f"Successfully updated quantity to {quantity} for order {order_id}")
+                    return True
+                else:
+                    print(f"No changes made to order {order_id}")
+                    return False
+                
+        except Exception as e:
+            error_msg = f"Error updating order quantity: {str(e)}"
+            print(error_msg)
+            traceback.print_exc()
+            return False
+    
+    def delete_order_if_exists(self, order_id):
+        """
+        Delete an order in a single statement, reporting whether it existed
+        
+        Args:
+            order_id (int): ID of the order to delete
+        
+        Returns:
+            bool: True if the order was deleted, False if no such order exists
+        
+        Raises:
+            sqlite3.Error: If the database operation fails
+        """
+        with self._pool.connection() as conn:
             cursor = conn.cursor()
-            
-            # Get current order to validate it exists and check its status
             cursor.execute('''
-                SELECT status FROM orders
+                DELETE FROM orders
                 WHERE id = ?
             ''', (order_id,))
-            
-            order = cursor.fetchone()
-            if not order:
-                print(f"No order found with ID {order_id}")
-                conn.close()
-                return False
-            
-            # Only update if the order is in 'pending' status
-            if order[0] != 'pending':
-                print(f"Cannot update quantity for order with status '{order[0]}'")
-                conn.close()
-                return False
-            
-            # Update the order quantity
+            conn.commit()
+            return cursor.rowcount > 0
+    
+    def update_order_quantity_if_pending(self, order_id, quantity):
+        """
+        Update the quantity of an order only if it is still pending.
+        The status check is part of the UPDATE, so the success path is a single
+        statement; the current status is only read back when nothing was updated.
+        
+        Args:
+            order_id (int): ID of the order to update
+            quantity (int): New quantity value
+        
+        Returns:
+            str: Status of the order before the update ('pending' if it was updated),
+                 or None if no such order exists
+        
+        Raises:
+            sqlite3.Error: If the database operation fails
+        """
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
             cursor.execute('''
-                UPDATE orders 
+                UPDATE orders
                 SET quantity = ?,
                     timestamp = ?
-                WHERE id = ?
+                WHERE id = ? AND status = 'pending'
             ''', (quantity, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), order_id))
-            
-            # Check if any rows were updated
-            affected_rows = cursor.rowcount
-            
             conn.commit()
-            conn.close()
-            
-            if affected_rows > 0:
-                print(f"Successfully updated quantity to {quantity} for order {order_id}")
-                return True
-            else:
-                print(f"No changes made to order {order_id}")
-                return False
             
-        except Exception as e:
-            error_msg = f"Error updating order quantity: {str(e)}"
-            print(error_msg)
-            traceback.print_exc()
-            return False
+            if cursor.rowcount > 0:
+                return 'pending'
             
+            # Nothing was updated - find out whether the order is missing or not pending
+            cursor.execute('''
+                SELECT status FROM orders
+                WHERE id = ?
+            ''', (order_id,))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
     def get_order(self, order_id):
         """
         Get a specific order by ID
@@ -385,25 +626,23 @@ class OptionsDatabase:
             dict: Order data or None if not found
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # This enables column access by name
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM orders
-                WHERE id = ?
-            ''', (order_id,))
-            
-            row = cursor.fetchone()
-            conn.close()
-            
-            if not row:
-                return None
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                cursor.execute('''
+                    SELECT * FROM orders
+                    WHERE id = ?
+                ''', (order_id,))
+                
+                row = cursor.fetchone()
+                
+                if not row:
+                    return None
+                    
+                # Convert row to dictionary
+                order = dict(row)
+                return order
                 
-            # Convert row to dictionary
-            order = dict(row)
-            return order
-            
         except Exception as e:
             print(f"Error getting order: {str(e)}")
             return None
@@ -423,46 +662,201 @@ class OptionsDatabase:
             list: List of order dictionaries
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # This enables column access by name
-            cursor = conn.cursor()
-            
-            # Build the query based on filters
-            query = "SELECT * FROM orders WHERE 1=1"
-            params = []
-            
-            # Handle status filtering (single status or list of statuses)
-            if status_filter is not None and isinstance(status_filter, list) and status_filter:
-                placeholders = ', '.join(['?' for _ in status_filter])
-                query += f" AND status IN ({placeholders})"
-                params.extend(status_filter)
-            elif status is not None:
-                query += " AND status = ?"
-                params.append(status)
-                
-            if executed is not None:
-                query += " AND executed = ?"
-                params.append(executed)
-                
-            if ticker is not None:
-                query += " AND ticker = ?"
-                params.append(ticker)
-                
-            query += " ORDER BY timestamp DESC LIMIT ?"
-            params.append(limit)
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Build the query based on filters
+                query = "SELECT * FROM orders WHERE 1=1"
+                params = []
+                
+                # Handle status filtering (single status or list of statuses)
+                if status_filter is not None and isinstance(status_filter, list) and status_filter:
+                    placeholders = ', '.join(['?' for _ in status_filter])
+                    query += f" AND status IN ({placeholders})"
+                    params.extend(status_filter)
+                elif status is not None:
+                    query += " AND status = ?"
+                    params.append(status)
+                    
+                if executed is not None:
+                    query += " AND executed = ?"
+                    params.append(executed)
+                    
+                if ticker is not None:
+                    query += " AND ticker = ?"
+                    params.append(ticker)
+                    
+                query += " ORDER BY timestamp DESC LIMIT ?"
+                params.append(limit)
+                
+                cursor.execute(query, params)
+                
+                rows = cursor.fetchall()
+                
+                # Convert rows to dictionaries
+                orders = []
+                for row in rows:
+                    order = dict(row)
+                    orders.append(order)
+                    
+                return orders
+        except Exception as e:
+            print(f"Error getting orders: {str(e)}")
+            return [] 
+    
+    def create_job(self, job_id, job_type, retention_hours=24):
+        """
+        Record a new queued background job, pruning old finished jobs
+        
+        Args:
+            job_id (str): Unique job ID
+            job_type (str): Kind of job, e.g. 'check_orders'
+            retention_hours (int): How long finished jobs are kept
             
-            cursor.execute(query, params)
+        Raises:
+            sqlite3.Error: If the database operation fails
+        """
+        now = datetime.now()
+        cutoff = (now - timedelta(hours=retention_hours)).strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = now.strftime('%Y-%m-%d %H:%M:%S')
+        with self._pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM jobs
+                WHERE updated_at < ? AND status IN ('finished', 'failed')
+            ''', (cutoff,))
+            cursor.execute('''
+                INSERT INTO jobs (id, job_type, status, created_at, updated_at)
+                VALUES (?, ?, 'queued', ?, ?)
+            ''', (job_id, job_type, timestamp, timestamp))
+            conn.commit()
+    
+    def update_job(self, job_id, status, result=None, status_code=None):
+        """
+        Update the status and result of a background job
+        
+        Args:
+            job_id (str): ID of the job to update
+            status (str): New status ('running', 'finished' or 'failed')
+            result (dict, optional): JSON-serializable job result
+            status_code (int, optional): HTTP status code of the result
             
-            rows = cursor.fetchall()
-            conn.close()
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    UPDATE jobs
+                    SET status = ?, result = ?, status_code = ?, updated_at = ?
+                    WHERE id = ?
+                ''', (
+                    status,
+                    json.dumps(result, default=str) if result is not None else None,
+                    status_code,
+                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    job_id
+                ))
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error updating job: {str(e)}")
+            return False
+    
+    def get_job(self, job_id):
+        """
+        Get a background job by ID
+        
+        Args:
+            job_id (str): ID of the job to retrieve
             
-            # Convert rows to dictionaries
-            orders = []
-            for row in rows:
-                order = dict(row)
-                orders.append(order)
+        Returns:
+            dict: Job data with the decoded result, or None if not found
+        """
+        try:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT * FROM jobs
+                    WHERE id = ?
+                ''', (job_id,))
+                row = cursor.fetchone()
+                
+                if not row:
+                    return None
                 
-            return orders
+                job = dict(row)
+                if job['result'] is not None:
+                    job['result'] = json.loads(job['result'])
+                return job
         except Exception as e:
-            print(f"Error getting orders: {str(e)}")
-            return [] 
\ No newline at end of file
+            print(f"Error getting job: {str(e)}")
+            return None
+
+class PendingOrderCache:
+    """
+    In-memory copy of the pending/processing orders, so polling them does not
+    query the orders table. The copy is reloaded only when the orders version
+    has changed, which also covers writes made by other processes and threads.
+    """
+    def __init__(self, db):
+        """
+        Initialize the cache
+        
+        Args:
+            db (OptionsDatabase): Database the orders are loaded from
+        """
+        self.db = db
+        self._lock = threading.RLock()
+        self._version = None
+        self._orders = []
+        self._changed = threading.Condition()
+    
+    def snapshot(self, version=None):
+        """
+        Get the pending orders, reloading them if the database has changed
+        
+        Args:
+            version (str, optional): Current result of db.orders_version(), if already known
+            
+        Returns:
+            list: List of order dictionaries
+        """
+        if version is None:
+            version = self.db.orders_version()
+        
+        with self._lock:
+            if self._version != version:
+                # Reading the version before the orders means a concurrent write can
+                # only leave newer data under an older version, causing one extra reload
+                self._orders = self.db.get_pending_orders(executed=False)
+                self._version = version
+            return list(self._orders)
+    
+    def invalidate(self):
+        """
+        Drop the cached orders so that the next snapshot reloads them
+        """
+        with self._lock:
+            self._version = None
+            self._orders = []
+    
+    def notify_changed(self):
+        """
+        Wake up threads waiting in wait_for_change, e.g. after writing an order
+        """
+        with self._changed:
+            self._changed.notify_all()
+    
+    def wait_for_change(self, timeout):
+        """
+        Block until notify_changed is called or timeout expires.
+        Writes from other processes are not notified, so callers should
+        still compare orders_version() after waking up.
+        
+        Args:
+            timeout (float): Maximum number of seconds to wait
+        """
+        with self._changed:
+            self._changed.wait(timeout)
\ No newline at end of file
@@ -72,19 +72,14 @@ async function fetchWeeklyOptionIncome() {
  */
 async function fetchOptionData(ticker, otmPercentage = 10, optionType = null) {
     try {
-        const timestamp = new Date().getTime();
-        const url = `/api/options/otm?tickers=${encodeURIComponent(ticker)}&otm=${otmPercentage}&real_time=true&options_only=true&t=${timestamp}`;
+        const url = `/api/options/otm?tickers=${encodeURIComponent(ticker)}&otm=${otmPercentage}&real_time=true&options_only=true`;
         
         // Add option type to URL if provided
         const finalUrl = optionType ? `${url}&optionType=${optionType}` : url;
         
-        const response = await fetch(finalUrl, {
-            headers: {
-                'Cache-Control': 'no-cache, no-store, must-revalidate',
-                'Pragma': 'no-cache',
-                'Expires': '0'
-            }
-        });
+        // Always ask the server, but send the cached copy's ETag so an unchanged
+        // result comes back as an empty 304 that the browser fills from its cache
+        const response = await fetch(finalUrl, { cache: 'no-cache' });
         
         if (!response.ok) {
             throw new Error(`HTTP error ${response.status}`);
@@ -201,6 +196,33 @@ async function saveOptionOrder(orderData) {
     }
 }
 
+/**
+ * Save several option orders in one request
+ * @param {Array} orders - List of order data objects
+ * @returns {Promise} Promise with the saved order IDs
+ */
+async function saveOptionOrders(orders) {
+    try {
+        const response = await fetch('/api/options/orders', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(orders)
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error ${response.status}`);
+        }
+        
+        return await response.json();
+    } catch (error) {
+        console.error('Error saving orders:', error);
+        showAlert(`Error saving orders: ${error.message}`, 'danger');
+        throw error;
+    }
+}
+
 /**
  * Cancel an order
  * @param {string} orderId - The order ID to cancel
@@ -229,6 +251,33 @@ async function cancelOrder(orderId) {
     }
 }
 
+/**
+ * Wait for a background job to finish
+ * @param {string} jobId - The job ID returned by the API
+ * @param {number} interval - Polling interval in milliseconds (default: 500)
+ * @returns {Promise} Promise with the job result
+ */
+async function waitForJob(jobId, interval = 500) {
+    while (true) {
+        const response = await fetch(`/api/options/jobs/${jobId}`);
+        const job = await response.json();
+        
+        if (!response.ok) {
+            throw new Error(job.error || `HTTP error ${response.status}`);
+        }
+        
+        if (job.status === 'finished' || job.status === 'failed') {
+            const result = job.result || {};
+            if (job.status === 'failed' || job.status_code >= 400) {
+                throw new Error(result.error || 'Background job failed');
+            }
+            return result;
+        }
+        
+        await new Promise(resolve => setTimeout(resolve, interval));
+    }
+}
+
 /**
  * Check status of pending/processing orders with TWS
  * @returns {Promise} Promise with updated orders
@@ -247,7 +296,9 @@ async function checkOrderStatus() {
             throw new Error(data.error || 'Failed to check order status');
         }
         
-        return await response.json();
+        // The request is processed in the background, wait for its result
+        const job = await response.json();
+        return await waitForJob(job.job_id);
     } catch (error) {
         console.error('Error checking order status:', error);
         // Don't show alert for this regular background operation
@@ -274,7 +325,9 @@ async function executeOrder(orderId) {
             throw new Error(data.error || 'Failed to execute order');
         }
         
-        return await response.json();
+        // The request is processed in the background, wait for its result
+        const job = await response.json();
+        return await waitForJob(job.job_id);
     } catch (error) {
         console.error('Error executing order:', error);
         showAlert(`Error executing order: ${error.message}`, 'danger');
@@ -291,6 +344,7 @@ export {
     fetchTickers,
     fetchPendingOrders,
     saveOptionOrder,
+    saveOptionOrders,
     cancelOrder,
     executeOrder,
     checkOrderStatus
@@ -1,7 +1,7 @@
 /**
  * Options Table module for handling options display and interaction
  */
-import { fetchOptionData, fetchTickers, saveOptionOrder, fetchAccountData } from './api.js';
+import { fetchOptionData, fetchTickers, saveOptionOrder, saveOptionOrders, fetchAccountData } from './api.js';
 import { showAlert } from '../utils/alerts.js';
 import { formatCurrency, formatPercentage } from './account.js';
 
@@ -1459,6 +1459,8 @@ async function sellAllOptions(optionType) {
     
     const successOrders = [];
     const failedOrders = [];
+    const ordersToSave = [];
+    const orderLabels = [];
     
     // Process each ticker
     const tickers = Object.keys(tickersData);
@@ -1569,30 +1571,29 @@ async function sellAllOptions(optionType) {
             orderData.premium = Math.max(orderData.strike * 0.01, 0.05);
         }
         
-        console.log('Submitting order with data:', orderData);
+        console.log('Queueing order with data:', orderData);
         
+        // Collect the order, all orders are saved together below
+        ordersToSave.push(orderData);
+        orderLabels.push(`${ticker} ${optionType} ${option.strike} ${option.expiration}`);
+    }
+    
+    // Save all collected orders in a single request
+    if (ordersToSave.length > 0) {
         try {
-            // Proceed directly without confirmation dialog
-            button.innerHTML = '<span class="spinner-border spinner-border-sm" role="status" aria-hidden="true"></span>';
-            button.disabled = true;
+            const result = await saveOptionOrders(ordersToSave);
             
-            // Save the order
-            const result = await saveOptionOrder(orderData);
-            
-            if (result && result.order_id) {
-                console.log(`Order saved successfully for ${ticker} ${optionType} ${option.strike} ${option.expiration}! Order ID: ${result.order_id}`);
-                successOrders.push(`${ticker} ${optionType} ${option.strike} ${option.expiration}`);
+            if (result && result.order_ids) {
+                console.log(`Orders saved successfully! Order IDs: ${result.order_ids.join(', ')}`);
+                successOrders.push(...orderLabels);
             } else {
-                console.error(`Failed to save order for ${ticker} ${optionType} ${option.strike} ${option.expiration}`);
-                failedOrders.push(`${ticker} ${optionType} ${option.strike} ${option.expiration}`);
+                console.error('Failed to save orders');
+                failedOrders.push(...orderLabels);
             }
         } catch (error) {
-            console.error(`Error saving order for ${ticker}:`, error);
-            failedOrders.push(`${ticker} ${optionType} ${option.strike} ${option.expiration}`);
+            console.error('Error saving orders:', error);
+            failedOrders.push(...orderLabels);
         }
-            
-            // Small delay to prevent overwhelming the server
-            await new Promise(resolve => setTimeout(resolve, 100));
     }
     
     // Log results
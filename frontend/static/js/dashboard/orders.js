@@ -13,6 +13,11 @@ let weeklyOptionIncomeData = {}; // Changed from filledOrdersData
 let autoRefreshTimer = null;
 const AUTO_REFRESH_INTERVAL = 10000; // 10 seconds
 
+// Server-sent stream of pending orders, with polling when the server refuses the stream
+let orderStream = null;
+let orderPollTimer = null;
+const ORDER_POLL_INTERVAL = 10000; // 10 seconds
+
 /**
  * Format date for display
  * @param {string|number} dateString - The date string or timestamp to format
@@ -635,6 +640,82 @@ async function updateOrderQuantity(orderId, quantity) {
     }
 }
 
+/**
+ * Show a new list of pending orders received from the stream or a poll
+ * @param {Array} orders - The pending orders
+ */
+function showPendingOrders(orders) {
+    pendingOrdersData = orders;
+    updatePendingOrdersTable();
+    
+    // Keep checking TWS while orders are being processed
+    if (pendingOrdersData.some(order => ['processing', 'canceling'].includes(order.status))) {
+        startAutoRefresh();
+    }
+}
+
+/**
+ * Subscribe to pending order updates pushed by the server.
+ * If the server refuses the stream, pending orders are polled instead.
+ */
+function startOrderStream() {
+    if (!window.EventSource) {
+        startOrderPolling();
+        return;
+    }
+    if (orderStream) {
+        return;
+    }
+    
+    orderStream = new EventSource('/api/options/orders/stream');
+    
+    orderStream.onmessage = (event) => {
+        const data = JSON.parse(event.data);
+        if (data && data.orders) {
+            showPendingOrders(data.orders);
+        }
+    };
+    
+    orderStream.onerror = () => {
+        // The browser reconnects by itself unless the server refused the stream
+        if (orderStream.readyState === EventSource.CLOSED) {
+            console.log('Pending order stream unavailable, polling instead');
+            orderStream = null;
+            startOrderPolling();
+        }
+    };
+}
+
+/**
+ * Poll the pending orders. Unchanged polls are answered with a 304 by the server.
+ */
+function startOrderPolling() {
+    if (orderPollTimer) {
+        return;
+    }
+    
+    orderPollTimer = setInterval(async () => {
+        const data = await fetchPendingOrders(false);
+        if (data && data.orders) {
+            showPendingOrders(data.orders);
+        }
+    }, ORDER_POLL_INTERVAL);
+}
+
+/**
+ * Close the pending order stream, or stop polling if the stream was refused
+ */
+function stopOrderStream() {
+    if (orderStream) {
+        orderStream.close();
+        orderStream = null;
+    }
+    if (orderPollTimer) {
+        clearInterval(orderPollTimer);
+        orderPollTimer = null;
+    }
+}
+
 // Set up event listener for the custom ordersUpdated event
 document.addEventListener('ordersUpdated', loadPendingOrders);
 
@@ -646,10 +727,16 @@ document.addEventListener('DOMContentLoaded', () => {
     if (pendingOrdersData.some(order => ['processing', 'canceling'].includes(order.status))) {
         startAutoRefresh();
     }
+    
+    // Receive pending order changes as they happen
+    startOrderStream();
 });
 
-// Make sure auto-refresh is stopped when the page is unloaded
-window.addEventListener('beforeunload', stopAutoRefresh);
+// Make sure auto-refresh and the order stream are stopped when the page is unloaded
+window.addEventListener('beforeunload', () => {
+    stopAutoRefresh();
+    stopOrderStream();
+});
 
 // Expose loadPendingOrders function globally
 window.loadPendingOrders = loadPendingOrders;
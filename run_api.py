@@ -13,6 +13,7 @@ import subprocess
 import importlib.util
 from dotenv import load_dotenv
 from core.logging_config import get_logger
+from config import DEFAULT_THREADS, DEFAULT_WORKERS
 
 # Load environment variables from .env file
 load_dotenv()
@@ -118,11 +119,22 @@ def main():
         
         # Get port from environment variable or use default
         port = os.environ.get('PORT', '5000')
-        workers = os.environ.get('WORKERS', '4')
+        workers = os.environ.get('WORKERS', str(DEFAULT_WORKERS))
+        # Threads per gunicorn worker. Requests mostly wait on TWS and the database,
+        # so a few threads per process raise concurrency without more processes.
+        # Each thread that talks to TWS opens its own API client (TWS allows ~32).
+        # One more thread than the two serving requests is kept for the pending
+        # order stream, which holds its thread while a dashboard is open.
+        threads = os.environ.get('THREADS', str(DEFAULT_THREADS))
         
         # Detect operating system
         is_windows = platform.system() == 'Windows'
         
+        # Passed on to the app, which sizes its TWS loader pool from them.
+        # Waitress serves from a single process with one thread per "worker".
+        os.environ['WORKERS'] = '1' if is_windows else workers
+        os.environ['THREADS'] = workers if is_windows else threads
+        
         if is_windows:
             # Windows: Use waitress
             logger.info(f"Starting Auto-Trader API server on port {port} with waitress (Windows)")
@@ -137,10 +149,10 @@ def main():
                 sys.exit(1)
         else:
             # Unix/Linux/Mac: Use gunicorn
-            logger.info(f"Starting Auto-Trader API server on port {port} with {workers} workers using gunicorn")
+            logger.info(f"Starting Auto-Trader API server on port {port} with {workers} workers x {threads} threads using gunicorn")
             try:
-                # Build the gunicorn command
-                cmd = f"gunicorn --workers={workers} --bind=0.0.0.0:{port} app:app"
+                # Build the gunicorn command, using threaded workers for the I/O-bound routes
+                cmd = f"gunicorn --workers={workers} --worker-class=gthread --threads={threads} --bind=0.0.0.0:{port} app:app"
                 # Run gunicorn
                 os.system(cmd)
             except Exception as e:
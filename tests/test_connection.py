@@ -0,0 +1,81 @@
+"""
+Tests for the IB connection module, run against a stand-in for the IB client
+"""
+
+import unittest
+from ib_insync import OptionChain, OptionComputation, Ticker
+
+from core.connection import IBConnection, _option_chain_cache
+
+
+class FakeIB:
+    """
+    Minimal stand-in for ib_insync.IB that answers with real Ticker objects
+    """
+    def __init__(self):
+        self.disconnectedEvent = self
+        self.stock_price = 100.0
+
+    def __iadd__(self, handler):
+        return self
+
+    def isConnected(self):
+        return True
+
+    def reqMarketDataType(self, data_type):
+        pass
+
+    def qualifyContracts(self, *contracts):
+        for i, contract in enumerate(contracts, start=1):
+            contract.conId = i
+        return list(contracts)
+
+    def reqSecDefOptParams(self, *args):
+        return [OptionChain('SMART', 1, 'AAPL', '100', ['20991231'], [90.0, 95.0, 100.0, 105.0, 110.0])]
+
+    def reqMktData(self, contract, *args):
+        if contract.secType == 'STK':
+            return Ticker(contract=contract, last=self.stock_price)
+        greeks = OptionComputation(0, 0.25, 0.3, 1.5, 0.4, 0.01, 0.2, -0.03, 100.0)
+        return Ticker(contract=contract, bid=1.0, ask=1.2, last=1.1, volume=50,
+                      callOpenInterest=1200, putOpenInterest=800, modelGreeks=greeks)
+
+    def cancelMktData(self, contract):
+        pass
+
+    def waitOnUpdate(self, timeout=0):
+        return True
+
+
+class GetOptionChainTest(unittest.TestCase):
+    def setUp(self):
+        _option_chain_cache.clear()
+        self.conn = IBConnection()
+        self.conn.ib = FakeIB()
+        self.conn._connected = True
+
+    def test_reads_ticker_fields(self):
+        result = self.conn.get_option_chain('AAPL', '20991231', targets={'C': 106, 'P': 94})
+
+        options = {option['option_type']: option for option in result['options']}
+        self.assertEqual(set(options), {'CALL', 'PUT'})
+        self.assertEqual(options['CALL']['strike'], 105.0)
+        self.assertEqual(options['PUT']['strike'], 95.0)
+        self.assertEqual(options['CALL']['open_interest'], 1200)
+        self.assertEqual(options['PUT']['open_interest'], 800)
+        self.assertEqual(options['CALL']['bid'], 1.0)
+        self.assertEqual(options['CALL']['delta'], 0.3)
+
+    def test_missing_values_become_zero(self):
+        self.conn.ib.reqMktData = lambda contract, *args: Ticker(contract=contract, last=100.0)
+        # The data never completes, so skip waiting out the timeout
+        self.conn._wait_for = lambda condition, timeout: condition()
+        result = self.conn.get_option_chain('AAPL', '20991231', right='C', target_strike=100)
+
+        option, = result['options']
+        self.assertEqual((option['bid'], option['ask'], option['volume'], option['open_interest']), (0, 0, 0, 0))
+        self.assertIsNone(option['delta'])
+
+
+if __name__ == '__main__':
+    unittest.main()
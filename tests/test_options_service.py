@@ -0,0 +1,25 @@
+"""
+Tests for the options service
+"""
+
+import unittest
+
+from config import DEFAULT_THREADS, DEFAULT_WORKERS, TWS_MAX_CLIENTS
+from api.services.options_service import otm_worker_count
+
+
+class OtmWorkerCountTest(unittest.TestCase):
+    def test_default_server_loads_tickers_concurrently(self):
+        self.assertGreater(otm_worker_count(DEFAULT_WORKERS, DEFAULT_THREADS), 1)
+
+    def test_stays_within_tws_client_limit(self):
+        for workers in (1, 2, 4, 8):
+            for threads in (1, 2, 3, 4):
+                loaders = otm_worker_count(workers, threads)
+                if threads + 1 + 1 <= TWS_MAX_CLIENTS // workers:
+                    self.assertLessEqual(workers * (threads + 1 + loaders), TWS_MAX_CLIENTS)
+                self.assertGreaterEqual(loaders, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()